@@ -7,6 +7,7 @@ import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from backend.project_service.middleware.auth_middleware import JwtDecodeMiddleware
 from backend.project_service.middleware.internal_middleware import InternalOnlyMiddleware
 from backend.project_service.routes.auth import router as auth_router
 from backend.project_service.routes.internal import router as internal_router
@@ -17,7 +18,12 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname
 
 app = FastAPI(title="Project Service", version="0.1.0")
 
-# Middleware (order matters — internal check before CORS)
+# There are no migrations yet, so tables are created on startup unless a
+# deployment manages the schema itself and sets AUTO_CREATE_TABLES=0.
+AUTO_CREATE_TABLES = os.environ.get("AUTO_CREATE_TABLES", "1") == "1"
+
+# Middleware (order matters — internal check before CORS, JWT decode innermost)
+app.add_middleware(JwtDecodeMiddleware)
 app.add_middleware(InternalOnlyMiddleware)
 app.add_middleware(
     CORSMiddleware,
@@ -42,7 +48,8 @@ async def health():
 @app.on_event("startup")
 async def startup():
     from backend.project_service.models.database import create_tables, async_session
-    await create_tables()
+    if AUTO_CREATE_TABLES:
+        await create_tables()
 
     # Recover projects stuck in transitional states from a previous crash
     from backend.project_service.tasks.inactivity_checker import recover_stuck_projects
@@ -50,4 +57,18 @@ async def startup():
         await recover_stuck_projects(db)
 
     from backend.project_service.tasks.inactivity_checker import run_inactivity_checker_loop
-    asyncio.create_task(run_inactivity_checker_loop(async_session))
+    from backend.project_service.services.project_service import run_ssh_key_pool_filler
+    # Keep a reference so the task isn't garbage collected and can be
+    # cancelled cleanly on shutdown.
+    app.state.background_tasks = [
+        asyncio.create_task(run_inactivity_checker_loop(async_session), name="inactivity-checker"),
+        asyncio.create_task(run_ssh_key_pool_filler(), name="ssh-key-pool"),
+    ]
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    tasks = getattr(app.state, "background_tasks", [])
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,18 +1,47 @@
-"""JWT authentication middleware — FastAPI dependency."""
+"""JWT authentication: ASGI middleware + FastAPI dependency.
 
-from fastapi import Depends, HTTPException
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+JwtDecodeMiddleware decodes the Bearer token once per request and stashes the
+payload in the ASGI scope state; get_current_user_id only reads it back.
+"""
+
+from fastapi import HTTPException, Request
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from backend.project_service.services.auth_service import decode_access_token
 
-_bearer_scheme = HTTPBearer()
+_BEARER_PREFIX = b"bearer "
+
+
+class JwtDecodeMiddleware:
+    """Decode the Authorization: Bearer token into scope["state"]["jwt_payload"].
+
+    The payload is None when the header is missing or the token is invalid;
+    rejecting the request is left to the get_current_user_id dependency so
+    public routes are unaffected.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            payload = None
+            for key, value in scope["headers"]:
+                if key == b"authorization":
+                    if value[:7].lower() == _BEARER_PREFIX:
+                        payload = decode_access_token(value[7:].strip().decode("latin-1"))
+                    break
+            scope.setdefault("state", {})["jwt_payload"] = payload
+        await self.app(scope, receive, send)
 
 
-async def get_current_user_id(
-    credentials: HTTPAuthorizationCredentials = Depends(_bearer_scheme),
-) -> str:
-    """FastAPI dependency: extract user_id from JWT Bearer token."""
-    payload = decode_access_token(credentials.credentials)
+async def get_current_user_id(request: Request) -> str:
+    """FastAPI dependency: user_id from the payload decoded by JwtDecodeMiddleware."""
+    payload = getattr(request.state, "jwt_payload", None)
     if payload is None:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return payload["sub"]
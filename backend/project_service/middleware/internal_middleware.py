@@ -3,18 +3,23 @@
 Authenticates via shared secret read from /secrets/internal-secret.
 """
 
+import hmac
 import logging
 import os
 from pathlib import Path
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 logger = logging.getLogger(__name__)
 
 INTERNAL_SECRET_PATH = os.environ.get("INTERNAL_SECRET_PATH", "/secrets/internal-secret")
 
+_NOT_FOUND_BODY = b'{"detail":"Not found"}'
+_NOT_FOUND_HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(_NOT_FOUND_BODY)).encode()),
+]
+
 
 def _load_secret() -> str | None:
     try:
@@ -23,24 +28,54 @@ def _load_secret() -> str | None:
         return None
 
 
-class InternalOnlyMiddleware(BaseHTTPMiddleware):
-    """Block all /internal/* requests without a valid X-Internal-Secret header."""
+def _header(scope: Scope, name: bytes) -> bytes | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+def _is_internal(scope: Scope) -> bool:
+    # Compare the undecoded bytes when possible. A percent-escape could hide
+    # the prefix (/%69nternal), so those paths use the decoded str path.
+    raw = scope.get("raw_path")
+    if raw and b"%" not in raw:
+        return raw.startswith(b"/internal")
+    return scope["path"].startswith("/internal")
+
+
+async def _send_not_found(send: Send):
+    await send({"type": "http.response.start", "status": 404, "headers": _NOT_FOUND_HEADERS})
+    await send({"type": "http.response.body", "body": _NOT_FOUND_BODY})
+
+
+class InternalOnlyMiddleware:
+    """Block all /internal/* requests without a valid X-Internal-Secret header.
+
+    Plain ASGI rather than BaseHTTPMiddleware: only the path and one header
+    are inspected, so there is no need to wrap every request in a task group.
+    """
 
-    def __init__(self, app):
-        super().__init__(app)
-        self._secret = _load_secret()
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        secret = _load_secret()
+        self._secret = secret.encode() if secret else None
 
-    async def dispatch(self, request: Request, call_next):
-        if request.url.path.startswith("/internal"):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and _is_internal(scope):
+            path = scope["path"]
             if not self._secret:
-                logger.info("[INTERNAL-MW] rejected %s: no secret configured", request.url.path)
-                return JSONResponse(status_code=404, content={"detail": "Not found"})
+                logger.info("[INTERNAL-MW] rejected %s: no secret configured", path)
+                await _send_not_found(send)
+                return
 
-            provided = request.headers.get("X-Internal-Secret")
-            if provided != self._secret:
-                logger.info("[INTERNAL-MW] rejected %s: secret mismatch (got %s chars)", request.url.path, len(provided) if provided else 0)
-                return JSONResponse(status_code=404, content={"detail": "Not found"})
+            provided = _header(scope, b"x-internal-secret")
+            if provided is None or not hmac.compare_digest(provided, self._secret):
+                logger.info("[INTERNAL-MW] rejected %s: secret mismatch (got %s chars)", path, len(provided) if provided else 0)
+                await _send_not_found(send)
+                return
 
-            logger.info("[INTERNAL-MW] passed %s from %s", request.url.path, request.client.host if request.client else "unknown")
+            client = scope.get("client")
+            logger.debug("[INTERNAL-MW] passed %s from %s", path, client[0] if client else "unknown")
 
-        return await call_next(request)
+        await self.app(scope, receive, send)
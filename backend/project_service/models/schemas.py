@@ -1,13 +1,10 @@
 """Pydantic request/response models."""
 
-import re
 from datetime import datetime
 from uuid import UUID
 
 from pydantic import BaseModel, field_validator
 
-SNAPSHOT_TAG_RE = re.compile(r"^\d{8}-\d{6}$")
-
 
 # --- Auth ---
 
@@ -70,7 +67,13 @@ class RestoreRequest(BaseModel):
     @field_validator("snapshot_tag")
     @classmethod
     def validate_snapshot_tag(cls, v: str | None) -> str | None:
-        if v is not None and not SNAPSHOT_TAG_RE.match(v):
+        if v is None:
+            return v
+        # YYYYMMDD-HHMMSS, checked by hand rather than with a regex.
+        if (
+            len(v) != 15 or v[8] != "-" or not v.isascii()
+            or not v[:8].isdecimal() or not v[9:].isdecimal()
+        ):
             raise ValueError("snapshot_tag must be in YYYYMMDD-HHMMSS format")
         return v
 
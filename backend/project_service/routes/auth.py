@@ -3,7 +3,7 @@
 from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from sqlalchemy import bindparam, delete, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.project_service.models.database import User, RefreshToken, get_db
@@ -20,25 +20,35 @@ from backend.project_service.services.auth_service import (
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+# Built once so SQLAlchemy's compiled cache and asyncpg's prepared statement
+# cache see the exact same statement on every call.
+_USER_EXISTS = select(User.id).where(User.email == bindparam("email"))
+_USER_CREDENTIALS = select(User.id, User.password_hash).where(User.email == bindparam("email"))
+# Rotation consumes the old token in the same statement that looks it up.
+_CONSUME_REFRESH_TOKEN = (
+    delete(RefreshToken)
+    .where(RefreshToken.token_hash == bindparam("token_hash"))
+    .returning(RefreshToken.user_id, RefreshToken.expires_at)
+)
+
 
 @router.post("/register", response_model=RegisterResponse, status_code=201)
 async def register(req: RegisterRequest, db: AsyncSession = Depends(get_db)):
     # Check for existing user
-    result = await db.execute(select(User).where(User.email == req.email))
-    if result.scalar_one_or_none() is not None:
+    result = await db.execute(_USER_EXISTS, {"email": req.email})
+    if result.first() is not None:
         raise HTTPException(status_code=409, detail="Email already registered")
 
     user = User(email=req.email, password_hash=hash_password(req.password))
     db.add(user)
     await db.commit()
-    await db.refresh(user)
     return RegisterResponse(user_id=user.id)
 
 
 @router.post("/login", response_model=TokenResponse)
 async def login(req: LoginRequest, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(User).where(User.email == req.email))
-    user = result.scalar_one_or_none()
+    result = await db.execute(_USER_CREDENTIALS, {"email": req.email})
+    user = result.one_or_none()
     if user is None or not verify_password(req.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
@@ -60,28 +70,25 @@ async def login(req: LoginRequest, db: AsyncSession = Depends(get_db)):
 @router.post("/refresh", response_model=TokenResponse)
 async def refresh(req: RefreshRequest, db: AsyncSession = Depends(get_db)):
     token_hash = hash_refresh_token(req.refresh_token)
-    result = await db.execute(select(RefreshToken).where(RefreshToken.token_hash == token_hash))
-    rt = result.scalar_one_or_none()
+    result = await db.execute(_CONSUME_REFRESH_TOKEN, {"token_hash": token_hash})
+    rt = result.one_or_none()
 
     if rt is None:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
     if rt.expires_at < datetime.now(timezone.utc):
-        await db.delete(rt)
-        await db.commit()
+        await db.commit()  # keep the delete: expired tokens are dropped
         raise HTTPException(status_code=401, detail="Refresh token expired")
 
-    # Delete old token (rotation)
-    await db.delete(rt)
-
     # Issue new tokens
     access_token = create_access_token(str(rt.user_id))
     new_refresh = create_refresh_token()
-    new_rt = RefreshToken(
-        user_id=rt.user_id,
-        token_hash=hash_refresh_token(new_refresh),
-        expires_at=datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRY_DAYS),
+    await db.execute(
+        insert(RefreshToken).values(
+            user_id=rt.user_id,
+            token_hash=hash_refresh_token(new_refresh),
+            expires_at=datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRY_DAYS),
+        )
     )
-    db.add(new_rt)
     await db.commit()
 
     return TokenResponse(access_token=access_token, refresh_token=new_refresh)
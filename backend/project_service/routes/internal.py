@@ -1,10 +1,11 @@
 """Internal routes: validate token + ownership."""
 
 import logging
-from datetime import datetime, timezone
+import time
 
+from cachetools import TTLCache
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.project_service.models.database import Project, get_db
@@ -17,10 +18,16 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/internal", tags=["internal"])
 
+# last_connection_at only feeds the inactivity checker (30 min threshold), so
+# writing it more than once every 30s per project is wasted work.
+CONNECTION_TOUCH_INTERVAL_SECONDS = 30
+_recent_touches: TTLCache = TTLCache(maxsize=10_000, ttl=CONNECTION_TOUCH_INTERVAL_SECONDS)
+
 
 @router.post("/validate", response_model=InternalValidateResponse)
 async def validate(req: InternalValidateRequest, db: AsyncSession = Depends(get_db)):
-    logger.info("[VALIDATE] project=%s token_len=%d token_prefix=%s", req.project_id, len(req.token), req.token[:20])
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[VALIDATE] project=%s token_len=%d token_prefix=%s", req.project_id, len(req.token), req.token[:20])
 
     # Decode JWT
     payload = decode_access_token(req.token)
@@ -29,23 +36,30 @@ async def validate(req: InternalValidateRequest, db: AsyncSession = Depends(get_
         raise HTTPException(status_code=401, detail="Invalid token")
 
     user_id = payload["sub"]
-    logger.info("[VALIDATE] JWT ok user=%s project=%s", user_id, req.project_id)
+    logger.debug("[VALIDATE] JWT ok user=%s project=%s", user_id, req.project_id)
 
-    # Check project ownership
-    result = await db.execute(
-        select(Project).where(
-            Project.id == req.project_id,
-            Project.user_id == user_id,
+    # Check project ownership, touching last_connection_at in the same query
+    # unless it was written recently.
+    owned = (Project.id == req.project_id, Project.user_id == user_id)
+    touch_key = (req.project_id, user_id)
+    # Decided once: the cache can change while we await the DB.
+    needs_touch = touch_key not in _recent_touches
+    if needs_touch:
+        result = await db.execute(
+            update(Project)
+            .where(*owned)
+            .values(last_connection_at=func.now())
+            .returning(Project.user_id)
         )
-    )
-    project = result.scalar_one_or_none()
-    if project is None:
+    else:
+        result = await db.execute(select(Project.user_id).where(*owned))
+    if result.first() is None:
         logger.info("[VALIDATE] ownership check failed user=%s project=%s", user_id, req.project_id)
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    # Update last_connection_at
-    project.last_connection_at = datetime.now(timezone.utc)
-    await db.commit()
+    if needs_touch:
+        await db.commit()
+        _recent_touches[touch_key] = time.monotonic()
 
-    logger.info("[VALIDATE] success user=%s project=%s", user_id, req.project_id)
+    logger.debug("[VALIDATE] success user=%s project=%s", user_id, req.project_id)
     return InternalValidateResponse(user_id=user_id)
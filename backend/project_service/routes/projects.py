@@ -6,8 +6,9 @@ import uuid
 
 logger = logging.getLogger(__name__)
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Response
+from pydantic import TypeAdapter
+from sqlalchemy import bindparam, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.project_service.middleware.auth_middleware import get_current_user_id
@@ -23,25 +24,52 @@ router = APIRouter(prefix="/projects", tags=["projects"])
 HOST_IP = os.environ.get("HOST_IP", "0.0.0.0")
 PROJECT_SERVICE_PORT = os.environ.get("PROJECT_SERVICE_PORT", "8000")
 
+# Serializes the project list straight to JSON bytes, skipping per-item
+# validation entirely (response_model is kept for the docs).
+_projects_adapter = TypeAdapter(list[ProjectResponse])
+
+_OWNED_PROJECT = select(Project).where(
+    Project.id == bindparam("project_id"), Project.user_id == bindparam("user_id"),
+)
+
 
 def _terminal_url(project_id: uuid.UUID) -> str:
     return f"ws://{HOST_IP}:{PROJECT_SERVICE_PORT}/ws/terminal/{project_id}"
 
 
-def _project_detail(p: Project) -> dict:
-    return {
-        "id": p.id,
-        "name": p.name,
-        "status": p.status,
-        "created_at": p.created_at,
-        "last_active_at": p.last_active_at,
-        "terminal_url": _terminal_url(p.id) if p.status == "running" else None,
-        "ssh_host": HOST_IP if p.status == "running" else None,
-        "ssh_port": p.ssh_host_port if p.status == "running" else None,
-        "ssh_private_key": p.ssh_private_key,
-        "last_backup_at": p.last_backup_at,
-        "last_snapshot_at": p.last_snapshot_at,
-    }
+_STOPPED_CONNECTION = {"terminal_url": None, "ssh_host": None, "ssh_port": None}
+
+
+def _project_detail(p: Project) -> ProjectDetailResponse:
+    # Values come straight from typed DB columns, so skip re-validation.
+    if p.status == "running":
+        connection = {
+            "terminal_url": _terminal_url(p.id),
+            "ssh_host": HOST_IP,
+            "ssh_port": p.ssh_host_port,
+        }
+    else:
+        connection = _STOPPED_CONNECTION
+    return ProjectDetailResponse.model_construct(
+        id=p.id,
+        name=p.name,
+        status=p.status,
+        created_at=p.created_at,
+        last_active_at=p.last_active_at,
+        ssh_private_key=p.ssh_private_key,
+        last_backup_at=p.last_backup_at,
+        last_snapshot_at=p.last_snapshot_at,
+        **connection,
+    )
+
+
+def _detail_response(p: Project, status_code: int = 200) -> Response:
+    """Serialize a project detail directly, bypassing response_model validation."""
+    return Response(
+        _project_detail(p).model_dump_json(),
+        status_code=status_code,
+        media_type="application/json",
+    )
 
 
 @router.get("", response_model=list[ProjectResponse])
@@ -50,15 +78,14 @@ async def list_projects(
     db: AsyncSession = Depends(get_db),
 ):
     result = await db.execute(
-        select(Project).where(Project.user_id == user_id).order_by(Project.created_at.desc())
+        select(
+            Project.id, Project.name, Project.status,
+            Project.created_at, Project.last_active_at,
+        ).where(Project.user_id == user_id).order_by(Project.created_at.desc())
     )
-    return [
-        ProjectResponse(
-            id=p.id, name=p.name, status=p.status,
-            created_at=p.created_at, last_active_at=p.last_active_at,
-        )
-        for p in result.scalars().all()
-    ]
+    # Rows come straight from typed DB columns, so skip re-validation.
+    projects = [ProjectResponse.model_construct(**row._mapping) for row in result]
+    return Response(_projects_adapter.dump_json(projects), media_type="application/json")
 
 
 @router.post("", response_model=ProjectCreateResponse, status_code=201)
@@ -73,7 +100,7 @@ async def create_project(
         import logging
         logging.getLogger(__name__).exception("create_project failed")
         raise HTTPException(status_code=500, detail=str(e))
-    return _project_detail(project)
+    return _detail_response(project, status_code=201)
 
 
 @router.get("/{project_id}", response_model=ProjectDetailResponse)
@@ -82,13 +109,11 @@ async def get_project(
     user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(Project).where(Project.id == project_id, Project.user_id == user_id)
-    )
+    result = await db.execute(_OWNED_PROJECT, {"project_id": project_id, "user_id": user_id})
     project = result.scalar_one_or_none()
     if project is None:
         raise HTTPException(status_code=404, detail="Project not found")
-    return _project_detail(project)
+    return _detail_response(project)
 
 
 @router.post("/{project_id}/stop", response_model=ProjectDetailResponse)
@@ -103,7 +128,7 @@ async def stop_project(
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    return _project_detail(project)
+    return _detail_response(project)
 
 
 @router.post("/{project_id}/start", response_model=ProjectDetailResponse)
@@ -120,7 +145,7 @@ async def start_project(
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    return _project_detail(project)
+    return _detail_response(project)
 
 
 @router.delete("/{project_id}")
@@ -150,7 +175,7 @@ async def snapshot_project(
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    return _project_detail(project)
+    return _detail_response(project)
 
 
 @router.post("/{project_id}/restore", response_model=ProjectDetailResponse)
@@ -165,7 +190,7 @@ async def restore_project(
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    return _project_detail(project)
+    return _detail_response(project)
 
 
 @router.get("/{project_id}/snapshots", response_model=list[SnapshotItem])
@@ -192,9 +217,11 @@ async def backup_status(
     db: AsyncSession = Depends(get_db),
 ):
     result = await db.execute(
-        select(Project).where(Project.id == project_id, Project.user_id == user_id)
+        select(
+            Project.last_backup_at, Project.snapshot_image, Project.last_snapshot_at,
+        ).where(Project.id == project_id, Project.user_id == user_id)
     )
-    project = result.scalar_one_or_none()
+    project = result.one_or_none()
     if project is None:
         raise HTTPException(status_code=404, detail="Project not found")
     return BackupStatusResponse(
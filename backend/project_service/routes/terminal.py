@@ -19,6 +19,10 @@ TERMINAL_PROXY_WS = "ws://terminal-proxy:9000"
 router = APIRouter()
 
 
+class _PipeClosed(Exception):
+    """One direction of the proxy finished; used to stop the other."""
+
+
 @router.websocket("/ws/terminal/{project_id}")
 async def terminal_proxy(ws: WebSocket, project_id: str):
     token = ws.query_params.get("token", "")
@@ -37,12 +41,12 @@ async def terminal_proxy(ws: WebSocket, project_id: str):
                         msg = await ws.receive()
                         if msg["type"] == "websocket.disconnect":
                             break
-                        if "bytes" in msg and msg["bytes"]:
-                            await upstream.send(msg["bytes"])
-                        elif "text" in msg and msg["text"]:
-                            await upstream.send(msg["text"])
+                        data = msg.get("bytes") or msg.get("text")
+                        if data:
+                            await upstream.send(data)
                 except (WebSocketDisconnect, websockets.ConnectionClosed):
                     pass
+                raise _PipeClosed
 
             async def upstream_to_browser():
                 try:
@@ -53,18 +57,16 @@ async def terminal_proxy(ws: WebSocket, project_id: str):
                             await ws.send_text(msg)
                 except (websockets.ConnectionClosed, WebSocketDisconnect):
                     pass
+                raise _PipeClosed
 
-            tasks = [
-                asyncio.create_task(browser_to_upstream()),
-                asyncio.create_task(upstream_to_browser()),
-            ]
-            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
-            for t in pending:
-                t.cancel()
-                try:
-                    await t
-                except asyncio.CancelledError:
-                    pass
+            # Whichever direction closes first raises _PipeClosed, which makes
+            # the TaskGroup cancel the other pump.
+            try:
+                async with asyncio.TaskGroup() as tg:
+                    tg.create_task(browser_to_upstream())
+                    tg.create_task(upstream_to_browser())
+            except* _PipeClosed:
+                pass
 
     except websockets.exceptions.InvalidStatus as e:
         logger.warning("[ws-proxy] upstream rejected project %s: %s", project_id[:8], e)
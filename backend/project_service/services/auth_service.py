@@ -1,19 +1,51 @@
 """Authentication service: password hashing and JWT management."""
 
+import functools
 import hashlib
 import os
 import secrets
+import stat
+import time
 from datetime import datetime, timedelta, timezone
 
 import bcrypt
 import jwt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from cachetools import TTLCache
+
+JWT_SECRET_RECHECK_SECONDS = 60
+
+
+@functools.lru_cache(maxsize=4)
+def _read_secret_file(path: str, mtime_ns: int) -> str:
+    """Read a secret file; cached per (path, mtime) so unchanged files are read once."""
+    with open(path, "rb") as f:
+        return f.read().strip().decode()
+
 
 def _load_jwt_secret() -> str:
     """Load JWT secret from file (preferred) or env var."""
     secret_file = os.environ.get("JWT_SECRET_FILE", "/secrets/jwt-secret")
-    if os.path.isfile(secret_file):
-        return open(secret_file).read().strip()
-    return os.environ.get("JWT_SECRET", "dev-secret-change-in-production")
+    try:
+        st = os.stat(secret_file)
+    except OSError:
+        st = None
+    if st is None or not stat.S_ISREG(st.st_mode):
+        return os.environ.get("JWT_SECRET", "dev-secret-change-in-production")
+    return _read_secret_file(secret_file, st.st_mtime_ns)
+
+
+# Re-stat the secret file at most once a minute so a rotated secret is picked
+# up without touching the filesystem on every request.
+_jwt_secret_cache: TTLCache = TTLCache(maxsize=1, ttl=JWT_SECRET_RECHECK_SECONDS)
+
+
+def _current_jwt_secret() -> str:
+    secret = _jwt_secret_cache.get("secret")
+    if secret is None:
+        secret = _jwt_secret_cache["secret"] = _load_jwt_secret()
+    return secret
 
 
 JWT_SECRET = _load_jwt_secret()
@@ -21,14 +53,52 @@ JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRY_MINUTES = 15
 REFRESH_TOKEN_BYTES = 32
 REFRESH_TOKEN_EXPIRY_DAYS = 30
+# Keys the refresh-token hash so leaked token_hash rows can't be checked
+# against guesses without the secret. blake2b accepts at most 64 key bytes.
+_REFRESH_TOKEN_PEPPER = JWT_SECRET.encode()[:64]
+DECODE_CACHE_TTL_SECONDS = 5
+
+# sha256(token) -> (payload, valid_until). Entries never outlive the token's
+# own exp; failed decodes are not cached so bad tokens are always re-verified.
+_decode_cache: TTLCache = TTLCache(maxsize=10_000, ttl=DECODE_CACHE_TTL_SECONDS)
+
+# Successful password checks are remembered for 30s so a burst of logins for
+# the same account pays for the KDF once. Only True results are cached: caching
+# failures would let a guessing attacker skip the KDF cost. The key includes
+# the stored hash, so a password change never matches a stale entry; the cost
+# is that a correct password stays in memory (as a digest) for up to 30s.
+_pw_cache: TTLCache = TTLCache(maxsize=2048, ttl=30)
+
+
+# Argon2id for new hashes; bcrypt hashes from before the switch still verify.
+# The cost is tunable so tests can hash cheaply; keep the defaults in production.
+ARGON2_TIME_COST = int(os.environ.get("ARGON2_TIME_COST", "2"))
+ARGON2_MEMORY_COST = int(os.environ.get("ARGON2_MEMORY_COST", "19456"))
+_ph = PasswordHasher(time_cost=ARGON2_TIME_COST, memory_cost=ARGON2_MEMORY_COST, parallelism=2)
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
 
 
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    return _ph.hash(password)
+
+
+def _check_password(password: str, password_hash: str) -> bool:
+    if password_hash.startswith(_BCRYPT_PREFIXES):
+        return bcrypt.checkpw(password.encode(), password_hash.encode())
+    try:
+        return _ph.verify(password_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False
 
 
 def verify_password(password: str, password_hash: str) -> bool:
-    return bcrypt.checkpw(password.encode(), password_hash.encode())
+    key = hashlib.sha256(password.encode() + b"|" + password_hash.encode()).digest()
+    if key in _pw_cache:
+        return True
+    ok = _check_password(password, password_hash)
+    if ok:
+        _pw_cache[key] = True
+    return ok
 
 
 def create_access_token(user_id: str) -> str:
@@ -38,14 +108,25 @@ def create_access_token(user_id: str) -> str:
         "iat": now,
         "exp": now + timedelta(minutes=ACCESS_TOKEN_EXPIRY_MINUTES),
     }
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    return jwt.encode(payload, _current_jwt_secret(), algorithm=JWT_ALGORITHM)
 
 
 def decode_access_token(token: str) -> dict | None:
+    key = hashlib.sha256(token.encode()).digest()
+    now = time.time()
+    cached = _decode_cache.get(key)
+    if cached is not None:
+        payload, valid_until = cached
+        if now < valid_until:
+            return payload
+        _decode_cache.pop(key, None)
+
     try:
-        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = jwt.decode(token, _current_jwt_secret(), algorithms=[JWT_ALGORITHM])
     except (jwt.InvalidTokenError, jwt.ExpiredSignatureError):
         return None
+    _decode_cache[key] = (payload, min(payload["exp"], now + DECODE_CACHE_TTL_SECONDS))
+    return payload
 
 
 def create_refresh_token() -> str:
@@ -53,4 +134,4 @@ def create_refresh_token() -> str:
 
 
 def hash_refresh_token(token: str) -> str:
-    return hashlib.sha256(token.encode()).hexdigest()
+    return hashlib.blake2b(token.encode(), key=_REFRESH_TOKEN_PEPPER, digest_size=16).hexdigest()
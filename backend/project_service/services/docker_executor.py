@@ -0,0 +1,23 @@
+"""Dedicated thread pool for blocking Docker SDK calls.
+
+Shared by the request-facing services and background tasks so all Docker
+daemon I/O is bounded by one pool.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+DOCKER_WORKERS = int(os.environ.get("DOCKER_WORKERS", "16"))
+
+# Blocking Docker SDK calls get their own pool so a burst of slow daemon
+# calls can't exhaust the default executor used by asyncio.to_thread (and
+# vice versa).
+_docker_executor = ThreadPoolExecutor(max_workers=DOCKER_WORKERS, thread_name_prefix="docker")
+
+
+async def run_docker(func, /, *args):
+    """Run a blocking Docker call on the Docker thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_docker_executor, functools.partial(func, *args))
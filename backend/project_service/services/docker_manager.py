@@ -5,6 +5,9 @@ Handles creation, start, stop, deletion of containers with
 correct volumes, port mappings, networks, and resource limits.
 """
 
+import atexit
+import contextlib
+import functools
 import logging
 import random
 import socket
@@ -17,34 +20,98 @@ logger = logging.getLogger(__name__)
 PORT_RANGE_START = 30000
 PORT_RANGE_END = 60000
 MAX_PORT_RETRIES = 3
+PORT_SCAN_ATTEMPTS = 256
 
 
+@functools.lru_cache(maxsize=1)
 def _get_client() -> docker.DockerClient:
-    """Get a Docker client from environment."""
+    """Get the shared Docker client (created from environment on first use).
+
+    docker-py clients are thread-safe and pool their connections to the
+    daemon, so one client serves every call, including those from
+    asyncio.to_thread workers.
+    """
     return docker.from_env()
 
 
-def find_free_port(start: int = PORT_RANGE_START, end: int = PORT_RANGE_END) -> int:
-    """Find a free TCP port in the given range.
+@atexit.register
+def close() -> None:
+    """Close the shared Docker client, if one was created."""
+    if _get_client.cache_info().currsize:
+        _get_client().close()
+        _get_client.cache_clear()
 
-    Binds a socket to verify availability. Ports are tried in random
-    order to reduce contention under concurrent calls.
 
-    Raises RuntimeError if no port is free in the range.
+def _bind_port(port: int) -> socket.socket:
+    """Bind and listen on a TCP port. Raises OSError if it is in use.
+
+    The socket listens so that, while held, other binds to the same port
+    fail even with SO_REUSEADDR (Linux only refuses a reuse bind when the
+    existing socket is listening).
+    """
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        s.bind(("0.0.0.0", port))
+        s.listen(1)
+    except OSError:
+        s.close()
+        raise
+    return s
+
+
+def _bind_free_port(start: int, end: int) -> socket.socket:
+    """Return a listening socket bound to a free port in [start, end].
+
+    First lets the kernel pick an ephemeral port (one syscall); that is used
+    when it falls inside the range, which it usually does for the default
+    range. Otherwise ports in the range are probed in random order to reduce
+    contention under concurrent calls.
     """
-    ports = list(range(start, end + 1))
-    random.shuffle(ports)
-    for port in ports:
+    s = _bind_port(0)
+    if start <= s.getsockname()[1] <= end:
+        return s
+    s.close()
+
+    # Sample lazily from the range instead of materialising and shuffling it.
+    # Small ranges are covered exhaustively.
+    candidates = range(start, end + 1)
+    for port in random.sample(candidates, k=min(len(candidates), PORT_SCAN_ATTEMPTS)):
         try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                s.bind(("0.0.0.0", port))
-                return port
+            return _bind_port(port)
         except OSError:
             continue
     raise RuntimeError(f"No free port found in range {start}-{end}")
 
 
+@contextlib.contextmanager
+def reserve_port(start: int = PORT_RANGE_START, end: int = PORT_RANGE_END):
+    """Reserve a free TCP port in the given range.
+
+    Yields (port, sock). The port stays held by sock until the caller closes
+    it (right before dockerd binds the port) or the block exits, so
+    concurrent reservations can't hand out the same port.
+
+    Raises RuntimeError if no port is free in the range.
+    """
+    sock = _bind_free_port(start, end)
+    try:
+        yield sock.getsockname()[1], sock
+    finally:
+        sock.close()
+
+
+def find_free_port(start: int = PORT_RANGE_START, end: int = PORT_RANGE_END) -> int:
+    """Find a free TCP port in the given range.
+
+    The port is released before returning; use reserve_port to keep holding it.
+
+    Raises RuntimeError if no port is free in the range.
+    """
+    with reserve_port(start, end) as (port, _sock):
+        return port
+
+
 def create_network(project_id: str) -> str:
     """Create a per-container bridge network. Returns the network name."""
     client = _get_client()
@@ -84,7 +151,7 @@ def delete_volume(project_id: str) -> None:
 def create_container(project_id: str, config: dict) -> tuple:
     """Create a sandbox container with full configuration.
 
-    Orchestrates: create network -> create volume -> find port -> run container.
+    Orchestrates: create network -> create volume -> find port -> create + start container.
     On failure, cleans up any resources created before the failure point.
 
     config keys:
@@ -114,38 +181,56 @@ def create_container(project_id: str, config: dict) -> tuple:
         create_volume(project_id)
         volume_created = True
 
+        # Low-level API: one create (network attached inline) + one start,
+        # without the inspect calls containers.run() makes to build a model.
+        api = client.api
+        name = f"sandbox-{project_id}"
+        environment = {
+            "PROJECT_ID": str(project_id),
+            "GCS_BUCKET": config["gcs_bucket"],
+            "GCS_PREFIX": str(project_id),
+            "GCS_SA_KEY": config["gcs_sa_key"],
+            "SSH_PUBLIC_KEY": config["ssh_public_key"],
+        }
+        networking_config = api.create_networking_config({
+            f"net-{project_id}": api.create_endpoint_config(),
+        })
+
         last_error = None
         for attempt in range(MAX_PORT_RETRIES):
-            ssh_port = find_free_port()
-            try:
-                container = client.containers.run(
-                    image=config["image"],
-                    name=f"sandbox-{project_id}",
-                    detach=True,
-                    volumes={
-                        f"vol-{project_id}": {"bind": "/home/agent", "mode": "rw"},
-                    },
-                    ports={"22/tcp": ssh_port},
-                    environment={
-                        "PROJECT_ID": str(project_id),
-                        "GCS_BUCKET": config["gcs_bucket"],
-                        "GCS_PREFIX": str(project_id),
-                        "GCS_SA_KEY": config["gcs_sa_key"],
-                        "SSH_PUBLIC_KEY": config["ssh_public_key"],
-                    },
-                    network=f"net-{project_id}",
+            with reserve_port() as (ssh_port, port_sock):
+                host_config = api.create_host_config(
+                    binds={f"vol-{project_id}": {"bind": "/home/agent", "mode": "rw"}},
+                    port_bindings={22: ssh_port},
+                    network_mode=f"net-{project_id}",
                     cap_add=["SYS_ADMIN"],
                     devices=["/dev/fuse"],
                     security_opt=["apparmor:unconfined"],
                     mem_limit="1g",
                     nano_cpus=1_000_000_000,
                 )
-                return container.id, ssh_port
-            except APIError as e:
-                if "port is already allocated" in str(e).lower() and attempt < MAX_PORT_RETRIES - 1:
-                    last_error = e
-                    continue
-                raise
+                container_id = api.create_container(
+                    config["image"],
+                    name=name,
+                    environment=environment,
+                    ports=[22],
+                    host_config=host_config,
+                    networking_config=networking_config,
+                )["Id"]
+                # Ports are bound at start: release our hold just before.
+                port_sock.close()
+                try:
+                    api.start(container_id)
+                    return container_id, ssh_port
+                except APIError as e:
+                    try:
+                        api.remove_container(container_id, force=True)
+                    except APIError:
+                        pass
+                    if "port is already allocated" in str(e).lower() and attempt < MAX_PORT_RETRIES - 1:
+                        last_error = e
+                        continue
+                    raise
         raise last_error
 
     except Exception:
@@ -165,17 +250,38 @@ def create_container(project_id: str, config: dict) -> tuple:
 TERMINAL_PROXY_CONTAINER = "terminal-proxy"
 
 
+@functools.lru_cache(maxsize=1)
+def _proxy_container_id() -> str:
+    """Resolve the terminal-proxy container ID once, so network ops skip
+    dockerd's name lookup."""
+    return _get_client().api.inspect_container(TERMINAL_PROXY_CONTAINER)["Id"]
+
+
+def _with_proxy_id(op):
+    """Call op(proxy_id), re-resolving the ID once if the proxy was recreated.
+
+    Other NotFound errors (e.g. the sandbox network is gone) propagate
+    without touching the cached ID.
+    """
+    try:
+        return op(_proxy_container_id())
+    except NotFound as e:
+        if "no such container" not in str(e).lower():
+            raise
+        _proxy_container_id.cache_clear()
+        return op(_proxy_container_id())
+
+
 def connect_proxy_to_network(project_id: str) -> None:
     """Connect the terminal-proxy container to a sandbox's network.
 
     This allows the proxy to reach ttyd inside the sandbox via bridge IP.
     Idempotent — silently succeeds if already connected.
     """
-    client = _get_client()
+    api = _get_client().api
     network_name = f"net-{project_id}"
     try:
-        network = client.networks.get(network_name)
-        network.connect(TERMINAL_PROXY_CONTAINER)
+        _with_proxy_id(lambda proxy_id: api.connect_container_to_network(proxy_id, network_name))
     except APIError as e:
         if "already exists" in str(e).lower():
             pass  # Already connected
@@ -185,11 +291,10 @@ def connect_proxy_to_network(project_id: str) -> None:
 
 def disconnect_proxy_from_network(project_id: str) -> None:
     """Disconnect the terminal-proxy from a sandbox's network. Idempotent."""
-    client = _get_client()
+    api = _get_client().api
     network_name = f"net-{project_id}"
     try:
-        network = client.networks.get(network_name)
-        network.disconnect(TERMINAL_PROXY_CONTAINER)
+        _with_proxy_id(lambda proxy_id: api.disconnect_container_from_network(proxy_id, network_name))
     except NotFound:
         pass  # Network already gone
     except APIError as e:
@@ -214,8 +319,8 @@ def delete_container(project_id: str) -> None:
     """
     client = _get_client()
     try:
-        container = client.containers.get(f"sandbox-{project_id}")
-        container.remove(force=True)
+        # One DELETE by name; force kills a running container in the same call.
+        client.api.remove_container(f"sandbox-{project_id}", force=True, v=False)
     except NotFound:
         pass
 
@@ -223,9 +328,10 @@ def delete_container(project_id: str) -> None:
 def get_container_ip(project_id: str) -> str:
     """Get the bridge network IP address of a container."""
     client = _get_client()
-    container = client.containers.get(f"sandbox-{project_id}")
+    # Raw inspect: skips building a Container model around the response.
+    attrs = client.api.inspect_container(f"sandbox-{project_id}")
     network_name = f"net-{project_id}"
-    networks = container.attrs["NetworkSettings"]["Networks"]
+    networks = attrs["NetworkSettings"]["Networks"]
     if network_name not in networks:
         raise ValueError(f"Container not connected to network {network_name}")
     return networks[network_name]["IPAddress"]
@@ -5,22 +5,54 @@ Handles creation, key generation, IAM binding, and deletion of
 per-user service accounts and buckets for GCS tenant isolation.
 """
 
+import functools
 import hashlib
+import itertools
+import json
+import time
 
 from google.cloud import iam_admin_v1
 from google.oauth2 import service_account
 
+GCS_BATCH_SIZE = 100  # max operations per GCS JSON batch request
+GCS_HTTP_POOL_SIZE = 32
+IAM_POLICY_MAX_ATTEMPTS = 5
 
+
+@functools.lru_cache(maxsize=8)
 def _get_credentials(credentials_path: str):
-    """Load SA credentials from a JSON key file."""
+    """Load SA credentials from a JSON key file (cached per path)."""
     return service_account.Credentials.from_service_account_file(credentials_path)
 
 
+@functools.lru_cache(maxsize=8)
 def _get_iam_client(credentials_path: str) -> iam_admin_v1.IAMClient:
-    """Get an IAM admin client."""
+    """Get an IAM admin client (cached per path, reusing its gRPC channel)."""
     return iam_admin_v1.IAMClient(credentials=_get_credentials(credentials_path))
 
 
+@functools.lru_cache(maxsize=8)
+def _get_storage_client(credentials_path: str, gcp_project: str):
+    """Get a GCS client (cached per path and project).
+
+    The client gets its own authorized session with a larger connection pool
+    than requests' default of 10, so concurrent calls from worker threads
+    reuse warm TLS connections instead of opening new ones.
+    """
+    from google.auth.credentials import with_scopes_if_required
+    from google.auth.transport.requests import AuthorizedSession
+    from google.cloud import storage as gcs
+    from requests.adapters import HTTPAdapter
+
+    credentials = with_scopes_if_required(_get_credentials(credentials_path), gcs.Client.SCOPE)
+    session = AuthorizedSession(credentials)
+    session.mount("https://", HTTPAdapter(
+        pool_connections=GCS_HTTP_POOL_SIZE, pool_maxsize=GCS_HTTP_POOL_SIZE,
+    ))
+    return gcs.Client(credentials=credentials, project=gcp_project, _http=session)
+
+
+@functools.lru_cache(maxsize=1024)
 def make_sa_id(user_id: str) -> str:
     """Generate a deterministic SA ID from a user ID.
 
@@ -37,6 +69,7 @@ def make_sa_id(user_id: str) -> str:
     return f"sa-{digest}"
 
 
+@functools.lru_cache(maxsize=1024)
 def make_bucket_name(user_id: str, gcp_project: str) -> str:
     """Generate a deterministic bucket name for a user.
 
@@ -52,11 +85,9 @@ def create_bucket(
     location: str = "EUROPE-WEST1",
 ) -> None:
     """Create a GCS bucket. Idempotent (ignores 409 Conflict)."""
-    from google.cloud import storage as gcs
     from google.api_core import exceptions as gcp_exceptions
 
-    credentials = _get_credentials(credentials_path)
-    client = gcs.Client(credentials=credentials, project=gcp_project)
+    client = _get_storage_client(credentials_path, gcp_project)
     bucket_obj = client.bucket(bucket_name)
     bucket_obj.storage_class = "STANDARD"
     try:
@@ -108,30 +139,57 @@ def create_sa_key(sa_email: str, gcp_project: str, credentials_path: str) -> str
     return key.private_key_data.decode("utf-8")
 
 
+def delete_sa_key(sa_key: str, gcp_project: str, credentials_path: str) -> None:
+    """Delete a key returned by create_sa_key (e.g. one that was never stored). Idempotent."""
+    from google.api_core import exceptions as gcp_exceptions
+
+    client = _get_iam_client(credentials_path)
+    key = json.loads(sa_key)
+    key_name = (
+        f"projects/{gcp_project}/serviceAccounts/{key['client_email']}/keys/{key['private_key_id']}"
+    )
+    try:
+        client.delete_service_account_key(
+            request=iam_admin_v1.DeleteServiceAccountKeyRequest(name=key_name)
+        )
+    except gcp_exceptions.NotFound:
+        pass  # Already deleted — idempotent
+
+
 def grant_bucket_iam(
     sa_email: str,
     bucket_name: str,
     gcp_project: str,
     credentials_path: str,
 ) -> None:
-    """Grant unconditional roles/storage.objectAdmin on the user's bucket."""
-    from google.cloud import storage as gcs
+    """Grant unconditional roles/storage.objectAdmin on the user's bucket.
 
-    credentials = _get_credentials(credentials_path)
-    client = gcs.Client(credentials=credentials, project=gcp_project)
-    bucket_obj = client.bucket(bucket_name)
-
-    policy = bucket_obj.get_iam_policy(requested_policy_version=3)
-    policy.version = 3
+    The policy is read-modify-written with its etag; if another writer got
+    in between (412 PreconditionFailed) the whole cycle is retried with
+    exponential backoff.
+    """
+    from google.api_core import exceptions as gcp_exceptions
 
+    client = _get_storage_client(credentials_path, gcp_project)
+    bucket_obj = client.bucket(bucket_name)
     member = f"serviceAccount:{sa_email}"
-    policy.bindings.append(
-        {
-            "role": "roles/storage.objectAdmin",
-            "members": {member},
-        }
-    )
-    bucket_obj.set_iam_policy(policy)
+
+    for attempt in range(IAM_POLICY_MAX_ATTEMPTS):
+        policy = bucket_obj.get_iam_policy(requested_policy_version=3)
+        policy.version = 3
+        policy.bindings.append(
+            {
+                "role": "roles/storage.objectAdmin",
+                "members": {member},
+            }
+        )
+        try:
+            bucket_obj.set_iam_policy(policy)
+            return
+        except gcp_exceptions.PreconditionFailed:
+            if attempt == IAM_POLICY_MAX_ATTEMPTS - 1:
+                raise
+            time.sleep(0.05 * 2 ** attempt)
 
 
 def delete_gcs_prefix(
@@ -141,26 +199,30 @@ def delete_gcs_prefix(
     credentials_path: str,
 ) -> None:
     """Delete all objects under a prefix in a bucket (for project deletion)."""
-    from google.cloud import storage as gcs
+    from google.api_core import exceptions as gcp_exceptions
 
-    credentials = _get_credentials(credentials_path)
-    client = gcs.Client(credentials=credentials, project=gcp_project)
+    client = _get_storage_client(credentials_path, gcp_project)
     bucket_obj = client.bucket(bucket_name)
 
-    blobs = list(bucket_obj.list_blobs(prefix=prefix))
-    if blobs:
-        bucket_obj.delete_blobs(blobs)
+    # Stream the listing and delete through the JSON batch endpoint, which
+    # takes up to 100 operations per HTTP request.
+    blobs = bucket_obj.list_blobs(prefix=prefix, page_size=1000)
+    while chunk := list(itertools.islice(blobs, GCS_BATCH_SIZE)):
+        try:
+            with client.batch():
+                for blob in chunk:
+                    blob.delete()
+        except gcp_exceptions.NotFound:
+            pass  # Deleted concurrently — the rest of the batch still ran
 
 
 def delete_bucket(
     bucket_name: str, gcp_project: str, credentials_path: str,
 ) -> None:
     """Force-delete a bucket (deletes all objects first). For future user deletion."""
-    from google.cloud import storage as gcs
     from google.api_core import exceptions as gcp_exceptions
 
-    credentials = _get_credentials(credentials_path)
-    client = gcs.Client(credentials=credentials, project=gcp_project)
+    client = _get_storage_client(credentials_path, gcp_project)
     bucket_obj = client.bucket(bucket_name)
     try:
         bucket_obj.delete(force=True)
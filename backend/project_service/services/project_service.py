@@ -1,7 +1,9 @@
 """Project lifecycle orchestration.
 
 Coordinates Docker, GCP IAM, and snapshot managers for project operations.
-All sync manager calls are wrapped with asyncio.to_thread().
+All sync manager calls run off the event loop: Docker calls (including
+snapshot/restore) on the shared Docker thread pool (run_docker), everything
+else via asyncio.to_thread().
 """
 
 import asyncio
@@ -12,11 +14,13 @@ from datetime import datetime, timezone
 
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
-from sqlalchemy import select
+from sqlalchemy import bindparam, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
 from backend.project_service.models.database import Project, User
 from backend.project_service.services import docker_manager as docker_mgr
+from backend.project_service.services.docker_executor import run_docker
 from backend.project_service.services import gcp_iam
 from backend.project_service.services import snapshot_manager as snapshot_mgr
 
@@ -27,6 +31,13 @@ CREDENTIALS_PATH = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", "secrets/pro
 SANDBOX_IMAGE = os.environ.get("SANDBOX_IMAGE", "agent-sandbox:latest")
 HOST_IP = os.environ.get("HOST_IP", "0.0.0.0")
 TERMINAL_PROXY_PORT = os.environ.get("TERMINAL_PROXY_PORT", "9000")
+SSH_KEY_POOL_SIZE = int(os.environ.get("SSH_KEY_POOL_SIZE", "32"))
+
+
+_OWNED_PROJECT = select(Project).where(
+    Project.id == bindparam("project_id"), Project.user_id == bindparam("user_id"),
+)
+_OWNED_PROJECT_WITH_USER = _OWNED_PROJECT.options(joinedload(Project.user))
 
 
 def _generate_ssh_keypair() -> tuple[str, str]:
@@ -45,46 +56,118 @@ def _generate_ssh_keypair() -> tuple[str, str]:
     return public_bytes.decode(), private_bytes.decode()
 
 
+# Pre-generated keypairs so create_project doesn't do keygen inline.
+# Filled by run_ssh_key_pool_filler (started at app startup).
+_ssh_key_pool: asyncio.Queue = asyncio.Queue(maxsize=SSH_KEY_POOL_SIZE)
+
+
+async def run_ssh_key_pool_filler() -> None:
+    """Keep the SSH keypair pool topped up. Called from app startup."""
+    while True:
+        keypair = await asyncio.to_thread(_generate_ssh_keypair)
+        await _ssh_key_pool.put(keypair)  # blocks while the pool is full
+
+
+async def _take_ssh_keypair() -> tuple[str, str]:
+    """Take a pooled keypair, or generate one on a worker thread if empty."""
+    try:
+        return _ssh_key_pool.get_nowait()
+    except asyncio.QueueEmpty:
+        return await asyncio.to_thread(_generate_ssh_keypair)
+
+
+async def _release_connection(db: AsyncSession) -> None:
+    """End the session's current transaction so its pooled connection is
+    returned before slow Docker/GCP I/O.
+
+    Sessions use expire_on_commit=False, so loaded objects stay usable and
+    the next query transparently checks out a connection again.
+    """
+    await db.commit()
+
+
+async def _gather_steps(steps: dict) -> dict:
+    """Await named steps concurrently; failures come back as values."""
+    return dict(zip(steps, await asyncio.gather(*steps.values(), return_exceptions=True)))
+
+
+def _raise_failed_step(results: dict) -> None:
+    for result in results.values():
+        if isinstance(result, BaseException):
+            raise result
+
+
+async def _discard_sa_key(user_id_str: str, sa_key: str) -> None:
+    """Best-effort delete of a key that won't be stored."""
+    try:
+        await asyncio.to_thread(gcp_iam.delete_sa_key, sa_key, GCP_PROJECT, CREDENTIALS_PATH)
+    except Exception as e:
+        logger.warning("[user:%s] Failed to delete unused SA key: %s", user_id_str, e)
+
+
 async def _ensure_user_gcp_resources(user: User, db: AsyncSession) -> None:
     """Ensure the user has a GCS bucket + service account.
 
-    Each step commits immediately so retries skip already-completed work.
+    Runs in two concurrent phases (bucket + SA, then grant + key) and commits
+    once at the end. A failed step still commits whatever succeeded first,
+    so retries skip already-completed work; the key is only stored once the
+    grant has succeeded, and deleted otherwise.
     """
     if user.gcp_sa_key:
         return  # Fully provisioned
 
     user_id_str = str(user.id)
     logger.info("[user:%s] Provisioning GCP resources...", user_id_str)
+    await _release_connection(db)
 
+    # The bucket and the SA are independent of each other.
+    created = {}
     if not user.gcs_bucket:
         bucket_name = gcp_iam.make_bucket_name(user_id_str, GCP_PROJECT)
         logger.info("[user:%s] Creating GCS bucket %s...", user_id_str, bucket_name)
-        await asyncio.to_thread(
+        created["bucket"] = asyncio.to_thread(
             gcp_iam.create_bucket, bucket_name, GCP_PROJECT, CREDENTIALS_PATH,
         )
-        user.gcs_bucket = bucket_name
-        await db.commit()
-
     if not user.gcp_sa_email:
         logger.info("[user:%s] Creating GCP service account...", user_id_str)
-        sa_email = await asyncio.to_thread(
+        created["sa"] = asyncio.to_thread(
             gcp_iam.create_service_account, user_id_str, GCP_PROJECT, CREDENTIALS_PATH,
         )
-        user.gcp_sa_email = sa_email
-        await db.commit()
-
-        logger.info("[user:%s] Granting bucket IAM on %s...", user_id_str, user.gcs_bucket)
-        await asyncio.to_thread(
+    results = await _gather_steps(created)
+    if "bucket" in results and not isinstance(results["bucket"], BaseException):
+        user.gcs_bucket = bucket_name
+    if "sa" in results and not isinstance(results["sa"], BaseException):
+        user.gcp_sa_email = results["sa"]
+    if any(isinstance(r, BaseException) for r in results.values()):
+        await db.commit()  # keep whichever half succeeded for the retry
+        _raise_failed_step(results)
+
+    # The bucket grant and the SA key only depend on the SA existing, so
+    # issue both GCP calls at once. The grant runs on every pass until a key
+    # is stored (re-granting the same binding is harmless), so a failed
+    # grant is retried even when phase 1 had nothing left to create.
+    logger.info("[user:%s] Granting bucket IAM on %s...", user_id_str, user.gcs_bucket)
+    logger.info("[user:%s] Creating SA key...", user_id_str)
+    results = await _gather_steps({
+        "grant": asyncio.to_thread(
             gcp_iam.grant_bucket_iam, user.gcp_sa_email, user.gcs_bucket, GCP_PROJECT, CREDENTIALS_PATH,
-        )
-
-    if not user.gcp_sa_key:
-        logger.info("[user:%s] Creating SA key...", user_id_str)
-        sa_key = await asyncio.to_thread(
+        ),
+        "key": asyncio.to_thread(
             gcp_iam.create_sa_key, user.gcp_sa_email, GCP_PROJECT, CREDENTIALS_PATH,
-        )
-        user.gcp_sa_key = sa_key
-        await db.commit()
+        ),
+    })
+
+    # The stored key marks the user as provisioned, so only keep it once the
+    # grant has succeeded; otherwise delete it (an SA holds at most 10 keys)
+    # and let the retry mint a fresh one. One commit persists both phases.
+    sa_key = results["key"]
+    if isinstance(sa_key, str):
+        if isinstance(results["grant"], BaseException):
+            await _discard_sa_key(user_id_str, sa_key)
+        else:
+            user.gcp_sa_key = sa_key
+    await db.commit()
+    _raise_failed_step(results)
 
     logger.info("[user:%s] GCP resources provisioned", user_id_str)
 
@@ -92,15 +175,23 @@ async def _ensure_user_gcp_resources(user: User, db: AsyncSession) -> None:
 async def create_project(user_id: uuid.UUID, name: str, db: AsyncSession) -> Project:
     """Create a new project: ensure user GCP resources -> Docker container -> DB record."""
     project_id = uuid.uuid4()
+    pid = str(project_id)
     logger.info("Creating project %s '%s' for user %s", project_id, name, user_id)
 
-    # Fetch user and ensure GCP resources
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one()
-    await _ensure_user_gcp_resources(user, db)
+    # The keypair doesn't depend on the user, so get it while the user is
+    # fetched and provisioned.
+    keypair_task = asyncio.create_task(_take_ssh_keypair())
+    try:
+        # Fetch user and ensure GCP resources
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one()
+        await _ensure_user_gcp_resources(user, db)
+    except BaseException:
+        keypair_task.cancel()
+        raise
 
-    gcs_prefix = f"{project_id}/workspace"
-    ssh_public_key, ssh_private_key = _generate_ssh_keypair()
+    gcs_prefix = f"{pid}/workspace"
+    ssh_public_key, ssh_private_key = await keypair_task
     logger.info("[%s] SSH keypair generated", project_id)
 
     # Insert DB record early (status=creating)
@@ -115,8 +206,8 @@ async def create_project(user_id: uuid.UUID, name: str, db: AsyncSession) -> Pro
     )
     db.add(project)
     await db.commit()
-    await db.refresh(project)
     logger.info("[%s] DB record created (status=creating)", project_id)
+    await _release_connection(db)
 
     try:
         # Create Docker container
@@ -127,23 +218,30 @@ async def create_project(user_id: uuid.UUID, name: str, db: AsyncSession) -> Pro
             "gcs_sa_key": user.gcp_sa_key,
             "ssh_public_key": ssh_public_key,
         }
-        container_id, ssh_port = await asyncio.to_thread(
-            docker_mgr.create_container, str(project_id), config,
+        container_id, ssh_port = await run_docker(
+            docker_mgr.create_container, pid, config,
         )
         logger.info("[%s] Container created: %s (SSH port %d)", project_id, container_id[:12], ssh_port)
-
-        await asyncio.to_thread(docker_mgr.connect_proxy_to_network, str(project_id))
-        logger.info("[%s] Terminal proxy connected to sandbox network", project_id)
-
+        # From here on a failure leaves Docker resources behind to clean up.
         project.container_id = container_id
-        project.container_name = f"sandbox-{project_id}"
-        project.volume_name = f"vol-{project_id}"
+
+        project.container_name = f"sandbox-{pid}"
+        project.volume_name = f"vol-{pid}"
         project.ssh_host_port = ssh_port
         project.status = "running"
 
-        await db.commit()
-        await db.refresh(project)
-        logger.info("[%s] Project ready (status=running)", project_id)
+        # The proxy attach and the status commit are independent. Both are
+        # awaited before failing so cleanup never overlaps the commit; a
+        # failed attach still ends in status=error via the cleanup below.
+        results = await asyncio.gather(
+            run_docker(docker_mgr.connect_proxy_to_network, pid),
+            db.commit(),
+            return_exceptions=True,
+        )
+        for outcome in results:
+            if isinstance(outcome, BaseException):
+                raise outcome
+        logger.info("[%s] Terminal proxy connected; project ready (status=running)", project_id)
         return project
 
     except Exception as e:
@@ -156,12 +254,15 @@ async def _cleanup_failed_create(project: Project, db: AsyncSession):
     """Clean up resources from a failed project creation.
 
     Only cleans Docker resources. Does NOT delete user SA/bucket.
+    create_container already unwinds its own partial work when it fails,
+    so Docker cleanup is only needed once it has returned a container.
     """
     logger.info("[%s] Cleaning up failed create...", project.id)
-    try:
-        await asyncio.to_thread(docker_mgr.cleanup_project_resources, str(project.id))
-    except Exception as e:
-        logger.warning("[%s] Docker cleanup error (ignored): %s", project.id, e)
+    if project.container_id:
+        try:
+            await run_docker(docker_mgr.cleanup_project_resources, str(project.id))
+        except Exception as e:
+            logger.warning("[%s] Docker cleanup error (ignored): %s", project.id, e)
     project.status = "error"
     await db.commit()
     logger.info("[%s] Cleanup done (status=error)", project.id)
@@ -169,17 +270,20 @@ async def _cleanup_failed_create(project: Project, db: AsyncSession):
 
 async def stop_project(project_id: uuid.UUID, user_id: uuid.UUID, db: AsyncSession) -> Project:
     """Stop a project: snapshot -> stop container."""
-    project = await _get_owned_project(project_id, user_id, db)
-    if project.status != "running":
-        raise ValueError(f"Project is not running (status={project.status})")
-
+    pid = str(project_id)
+    project = await _claim_project(
+        project_id, user_id, db, ("running",), "snapshotting", "Project is not running",
+    )
     logger.info("[%s] Stopping project (snapshotting)...", project_id)
-    project.status = "snapshotting"
+    # This commit is deliberate, not redundant: it publishes the transitional
+    # status to clients and to recover_stuck_projects, and it releases the
+    # pooled connection for the minutes the snapshot can take. Holding one
+    # transaction across the snapshot would hide both and pin a connection.
     await db.commit()
 
     try:
-        result = await asyncio.to_thread(
-            snapshot_mgr.snapshot_project, str(project_id), CREDENTIALS_PATH,
+        result = await run_docker(
+            snapshot_mgr.snapshot_project, pid, CREDENTIALS_PATH,
         )
         project.snapshot_image = result["snapshot_image"]
         project.last_snapshot_at = datetime.fromtimestamp(result["last_snapshot_at"], tz=timezone.utc)
@@ -192,7 +296,6 @@ async def stop_project(project_id: uuid.UUID, user_id: uuid.UUID, db: AsyncSessi
         raise
     finally:
         await db.commit()
-        await db.refresh(project)
 
     return project
 
@@ -206,17 +309,17 @@ async def start_project(
     If snapshot_tag is provided, restores from that specific snapshot tag
     instead of the latest snapshot.
     """
-    project = await _get_owned_project(project_id, user_id, db)
-    if project.status not in ("stopped", "error"):
-        raise ValueError(f"Project is not stopped (status={project.status})")
+    pid = str(project_id)
+    project = await _claim_project(
+        project_id, user_id, db, ("stopped", "error"), "restoring", "Project is not stopped",
+    )
 
     # Fetch user for GCP credentials
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one()
 
     logger.info("[%s] Starting project (restoring)...", project_id)
-    project.status = "restoring"
-    await db.commit()
+    await db.commit()  # publish "restoring" before the slow restore (see stop_project)
 
     try:
         config = {
@@ -227,31 +330,31 @@ async def start_project(
 
         if snapshot_tag:
             # Restore from a specific snapshot tag
-            image = f"{snapshot_mgr.AR_REGISTRY}/{project_id}:{snapshot_tag}"
+            image = f"{snapshot_mgr.AR_REGISTRY}/{pid}:{snapshot_tag}"
             logger.info("[%s] Restoring from specific snapshot: %s", project_id, image)
-            container_id = await asyncio.to_thread(
+            container_id = await run_docker(
                 snapshot_mgr.restore_from_snapshot,
-                str(project_id), image, config, CREDENTIALS_PATH,
+                pid, image, config, CREDENTIALS_PATH,
             )
         else:
             image = snapshot_mgr.restore_image_for_project(project.snapshot_image, SANDBOX_IMAGE)
             logger.info("[%s] Restoring from image: %s", project_id, image)
 
             if project.snapshot_image:
-                container_id = await asyncio.to_thread(
+                container_id = await run_docker(
                     snapshot_mgr.restore_from_snapshot,
-                    str(project_id), image, config, CREDENTIALS_PATH,
+                    pid, image, config, CREDENTIALS_PATH,
                 )
             else:
-                container_id = await asyncio.to_thread(
-                    snapshot_mgr.restore_from_gcs, str(project_id), image, config,
+                container_id = await run_docker(
+                    snapshot_mgr.restore_from_gcs, pid, image, config,
                 )
 
         project.container_id = container_id
         project.status = "running"
         project.last_active_at = datetime.now(timezone.utc)
 
-        await asyncio.to_thread(docker_mgr.connect_proxy_to_network, str(project_id))
+        await run_docker(docker_mgr.connect_proxy_to_network, pid)
         logger.info("[%s] Terminal proxy connected to sandbox network", project_id)
         logger.info("[%s] Project started (status=running)", project_id)
     except Exception as e:
@@ -260,7 +363,6 @@ async def start_project(
         raise
     finally:
         await db.commit()
-        await db.refresh(project)
 
     return project
 
@@ -269,6 +371,7 @@ async def list_snapshots(project_id: uuid.UUID, user_id: uuid.UUID, db: AsyncSes
     """List snapshot tags for a project. Returns sorted list of {tag, created_at}."""
     logger.info("[%s] Listing snapshots (user=%s)", project_id, user_id)
     await _get_owned_project(project_id, user_id, db)
+    await _release_connection(db)
     result = await asyncio.to_thread(snapshot_mgr.list_snapshots, str(project_id))
     logger.info("[%s] Found %d snapshot(s)", project_id, len(result))
     return result
@@ -281,28 +384,29 @@ async def snapshot_project(project_id: uuid.UUID, user_id: uuid.UUID, db: AsyncS
 
 async def delete_project(project_id: uuid.UUID, user_id: uuid.UUID, db: AsyncSession) -> None:
     """Delete a project: Docker teardown + GCS prefix cleanup. Does NOT delete user SA/bucket."""
-    project = await _get_owned_project(project_id, user_id, db)
+    pid = str(project_id)
+    project = await _get_owned_project(project_id, user_id, db, include_user=True)
+    user = project.user  # for the bucket name
     logger.info("[%s] Deleting project...", project_id)
-
-    # Fetch user for bucket name
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one()
+    await _release_connection(db)
 
     logger.info("[%s] Disconnecting terminal proxy from sandbox network...", project_id)
-    await asyncio.to_thread(docker_mgr.disconnect_proxy_from_network, str(project_id))
-
-    logger.info("[%s] Cleaning up Docker resources...", project_id)
-    await asyncio.to_thread(docker_mgr.cleanup_project_resources, str(project_id))
-
+    await run_docker(docker_mgr.disconnect_proxy_from_network, pid)
+
+    # Docker, GCS and AR cleanup are independent; run them together and
+    # only then surface the first failure.
+    cleanups = {
+        "docker": run_docker(docker_mgr.cleanup_project_resources, pid),
+        "snapshots": asyncio.to_thread(snapshot_mgr.delete_snapshot_images, pid),
+    }
     if user.gcs_bucket:
         logger.info("[%s] Deleting GCS prefix %s/ from bucket %s...", project_id, project_id, user.gcs_bucket)
-        await asyncio.to_thread(
+        cleanups["gcs"] = asyncio.to_thread(
             gcp_iam.delete_gcs_prefix,
-            user.gcs_bucket, f"{project_id}/", GCP_PROJECT, CREDENTIALS_PATH,
+            user.gcs_bucket, f"{pid}/", GCP_PROJECT, CREDENTIALS_PATH,
         )
-
-    logger.info("[%s] Deleting snapshot images...", project_id)
-    await asyncio.to_thread(snapshot_mgr.delete_snapshot_images, str(project_id))
+    logger.info("[%s] Cleaning up Docker resources and snapshot images...", project_id)
+    _raise_failed_step(await _gather_steps(cleanups))
 
     await db.delete(project)
     await db.commit()
@@ -311,12 +415,51 @@ async def delete_project(project_id: uuid.UUID, user_id: uuid.UUID, db: AsyncSes
 
 async def _get_owned_project(
     project_id: uuid.UUID, user_id: uuid.UUID, db: AsyncSession,
+    include_user: bool = False,
 ) -> Project:
-    """Fetch a project ensuring ownership. Raises ValueError if not found/not owned."""
-    result = await db.execute(
-        select(Project).where(Project.id == project_id, Project.user_id == user_id)
-    )
+    """Fetch a project ensuring ownership. Raises ValueError if not found/not owned.
+
+    With include_user, project.user is joined in the same query.
+    """
+    stmt = _OWNED_PROJECT_WITH_USER if include_user else _OWNED_PROJECT
+    result = await db.execute(stmt, {"project_id": project_id, "user_id": user_id})
     project = result.scalar_one_or_none()
     if project is None:
         raise ValueError("Project not found")
     return project
+
+
+async def _claim_project(
+    project_id: uuid.UUID, user_id: uuid.UUID, db: AsyncSession,
+    from_statuses: tuple[str, ...], to_status: str, wrong_status_msg: str,
+) -> Project:
+    """Atomically move an owned project from one of from_statuses to to_status.
+
+    A single UPDATE ... RETURNING both checks ownership and guards the state
+    transition, so two concurrent stop/start requests can't both proceed.
+    Raises ValueError if the project isn't found/owned or is in another state.
+    The caller commits.
+    """
+    result = await db.execute(
+        update(Project)
+        .where(
+            Project.id == project_id,
+            Project.user_id == user_id,
+            Project.status.in_(from_statuses),
+        )
+        .values(status=to_status)
+        .returning(Project)
+        .execution_options(populate_existing=True)
+    )
+    project = result.scalar_one_or_none()
+    if project is not None:
+        return project
+
+    # Slow path: only to produce the right error message.
+    result = await db.execute(
+        select(Project.status).where(Project.id == project_id, Project.user_id == user_id)
+    )
+    status = result.scalar_one_or_none()
+    if status is None:
+        raise ValueError("Project not found")
+    raise ValueError(f"{wrong_status_msg} (status={status})")
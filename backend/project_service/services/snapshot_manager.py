@@ -5,47 +5,103 @@ Handles docker commit, Artifact Registry push/pull, and container
 restoration from either snapshot images or GCS backups.
 """
 
-import json
+import functools
 import logging
+import os
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from operator import itemgetter
 
 import docker
+from cachetools import TTLCache
 from docker.errors import APIError, NotFound
+from google.api_core import exceptions as gcp_exceptions
 from google.cloud import artifactregistry_v1
 
+from backend.project_service.services import docker_manager as docker_mgr
+
 logger = logging.getLogger(__name__)
 
 AR_REGISTRY = "europe-west1-docker.pkg.dev/pomodex-fd2bcd/sandboxes"
 AR_PARENT = "projects/pomodex-fd2bcd/locations/europe-west1/repositories/sandboxes"
 GCS_KEY_PATH_DEFAULT = "secrets/gcs-test-key.json"
+AR_DELETE_WORKERS = 8
+AR_PAGE_SIZE = 500  # AR's list default is small; fewer pages, fewer RPCs
+AR_LIST_TIMEOUT_SECONDS = 10
+AR_BATCH_DELETE_TIMEOUT_SECONDS = 120
+
+# Snapshot refs recently seen in the local daemon, so warm restores skip the
+# images.get round-trip. Short TTL: images can be removed behind our back.
+# Restores run on worker threads, hence the lock.
+LOCAL_IMAGE_TTL_SECONDS = 60
+_local_images: TTLCache = TTLCache(maxsize=256, ttl=LOCAL_IMAGE_TTL_SECONDS)
+_local_images_lock = threading.Lock()
 
+# Snapshot tags are the commit time, formatted %Y%m%d-%H%M%S.
+_TAG_RE = re.compile(r"^(\d{4})(\d{2})(\d{2})-(\d{2})(\d{2})(\d{2})$")
 
+
+@functools.lru_cache(maxsize=1)
 def _get_ar_client() -> artifactregistry_v1.ArtifactRegistryClient:
-    """Get an Artifact Registry client (uses GOOGLE_APPLICATION_CREDENTIALS)."""
+    """Get the shared Artifact Registry client (uses GOOGLE_APPLICATION_CREDENTIALS).
+
+    Reused so the gRPC channel and auth token survive across calls.
+    """
     return artifactregistry_v1.ArtifactRegistryClient()
 
 
 def _get_client() -> docker.DockerClient:
-    """Get a Docker client from environment."""
-    return docker.from_env()
+    """Get the Docker client shared with docker_manager (one connection pool)."""
+    return docker_mgr._get_client()
 
 
-def _push_image(client: docker.DockerClient, image: str, tag: str, auth_config: dict) -> None:
-    """Push an image to AR and raise on failure."""
-    logger.info("Pushing %s:%s to AR", image, tag)
-    output = client.images.push(image, tag=tag, auth_config=auth_config)
+def _push_image(client: docker.DockerClient, image: str, tag: str, auth_config: dict) -> str | None:
+    """Push an image to AR and raise on failure.
 
-    # Docker SDK returns newline-delimited JSON; last line has the result
-    for line in output.strip().splitlines():
-        try:
-            msg = json.loads(line)
-        except json.JSONDecodeError:
-            continue
+    Returns the pushed manifest digest, if the daemon reported one.
+    """
+    logger.info("Pushing %s:%s to AR", image, tag)
+    digest = None
+    # Stream decoded progress events rather than buffering the whole NDJSON
+    # log, and stop at the first error.
+    for msg in client.images.push(
+        image, tag=tag, auth_config=auth_config, stream=True, decode=True,
+    ):
         if "error" in msg:
             raise RuntimeError(f"Push failed for {image}:{tag}: {msg['error']}")
+        if "aux" in msg:
+            digest = msg["aux"].get("Digest", digest)
 
     logger.info("Pushed %s:%s to AR", image, tag)
+    return digest
+
+
+def _move_latest_tag(project_id: str, digest: str) -> None:
+    """Point the project's AR "latest" tag at an already-pushed version."""
+    ar_client = _get_ar_client()
+    package = f"{AR_PARENT}/packages/{project_id}"
+    version = f"{package}/versions/{digest}"
+    try:
+        ar_client.update_tag(request=artifactregistry_v1.UpdateTagRequest(
+            tag=artifactregistry_v1.Tag(name=f"{package}/tags/latest", version=version),
+            update_mask={"paths": ["version"]},
+        ))
+    except gcp_exceptions.NotFound:
+        ar_client.create_tag(request=artifactregistry_v1.CreateTagRequest(
+            parent=package, tag_id="latest",
+            tag=artifactregistry_v1.Tag(version=version),
+        ))
+    logger.info("Moved %s:latest to %s", project_id, digest)
+
+
+@functools.lru_cache(maxsize=8)
+def _read_ar_key(sa_key_path: str, mtime_ns: int) -> str:
+    """Read an SA key file; the mtime in the cache key picks up rotations."""
+    with open(sa_key_path, "rb") as f:
+        return f.read().decode()
 
 
 def _ar_auth_config(sa_key_path: str) -> dict:
@@ -55,12 +111,21 @@ def _ar_auth_config(sa_key_path: str) -> dict:
     as the auth_config parameter. This avoids relying on daemon-level
     credential persistence across client instances.
     """
-    with open(sa_key_path) as f:
-        key_json = f.read()
-
+    key_json = _read_ar_key(sa_key_path, os.stat(sa_key_path).st_mtime_ns)
     return {"username": "_json_key", "password": key_json}
 
 
+def _tag_created_at(tag: str) -> datetime | None:
+    """Parse a snapshot timestamp tag, or return None if it isn't one."""
+    m = _TAG_RE.match(tag)
+    if not m:
+        return None
+    try:
+        return datetime(*map(int, m.groups()), tzinfo=timezone.utc)
+    except ValueError:
+        return None  # Right shape, impossible date
+
+
 def restore_image_for_project(snapshot_image: str | None, base_image: str) -> str:
     """Determine which image to use for restoring a project.
 
@@ -74,15 +139,16 @@ def restore_image_for_project(snapshot_image: str | None, base_image: str) -> st
 def snapshot_project(project_id: str, sa_key_path: str = GCS_KEY_PATH_DEFAULT) -> dict:
     """Snapshot a running container: rclone sync, docker commit, push to AR.
 
-    Steps:
+    Steps (the sync, push and stop overlap where they can):
     1. Run final rclone sync inside the container
     2. docker commit the container
     3. Tag with timestamp + latest
-    4. Push both tags to Artifact Registry
-    5. Stop and remove the container (volume preserved)
+    4. Push the timestamp tag to Artifact Registry and move AR's latest to it
+    5. Stop the container once the sync is done, and remove it once the push
+       has succeeded (volume preserved)
 
     Returns metadata dict:
-        snapshot_image: str  - AR image ref (registry/project_id:latest)
+        snapshot_image: str  - AR image ref pinned by digest (registry/project_id@sha256:...)
         last_snapshot_at: float - Unix timestamp
         status: str - "stopped"
     """
@@ -90,51 +156,111 @@ def snapshot_project(project_id: str, sa_key_path: str = GCS_KEY_PATH_DEFAULT) -
     container_name = f"sandbox-{project_id}"
     container = client.containers.get(container_name)
 
-    # 1. Final rclone sync
+    # 1. Final rclone sync, in the background: docker commit doesn't
+    # capture the /home/agent volume, so the sync only has to finish
+    # before the container is stopped.
     logger.info("Running final rclone sync for %s", project_id)
-    env = dict(e.split("=", 1) for e in container.attrs["Config"]["Env"])
-    gcs_bucket = env.get("GCS_BUCKET", "")
-    exit_code, output = container.exec_run(
-        [
-            "rclone", "sync", "/home/agent",
-            f":gcs:{gcs_bucket}/{project_id}/workspace",
-            "--transfers=8", "--checksum",
-            "--gcs-service-account-file=/tmp/gcs-key.json",
-            "--gcs-bucket-policy-only",
-        ],
-        user="root",
+    gcs_bucket = next(
+        (e[len("GCS_BUCKET="):] for e in container.attrs["Config"]["Env"] if e.startswith("GCS_BUCKET=")),
+        "",
     )
-    if exit_code != 0:
-        logger.warning("rclone sync returned %d: %s", exit_code, output.decode())
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        sync = pool.submit(
+            container.exec_run,
+            [
+                "rclone", "sync", "/home/agent",
+                f":gcs:{gcs_bucket}/{project_id}/workspace",
+                "--transfers=16", "--checkers=16", "--fast-list", "--checksum",
+                "--gcs-service-account-file=/tmp/gcs-key.json",
+                "--gcs-bucket-policy-only",
+            ],
+            user="root",
+        )
+
+        # 2. docker commit
+        logger.info("Committing container %s", container_name)
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        ar_image = f"{AR_REGISTRY}/{project_id}"
+
+        committed = container.commit(repository=ar_image, tag=timestamp)
+        # Also tag as latest locally, so restores on this host use it
+        # rather than an older local "latest".
+        committed.tag(ar_image, tag="latest")
+
+        # 3. Authenticate and push to AR. Only the timestamp tag is
+        # uploaded; "latest" is then moved to the same version through the
+        # AR API, which skips a second round of layer and manifest uploads.
+        auth_config = _ar_auth_config(sa_key_path)
+        push = pool.submit(_push_image, client, ar_image, timestamp, auth_config)
+
+        exit_code, output = sync.result()
+        if exit_code != 0:
+            logger.warning("rclone sync returned %d: %s", exit_code, output.decode())
+
+        # 4. Stop the container while the push runs; the image is already
+        # committed locally. Remove it (keeping the volume) only once the
+        # push succeeded: until then the container is the only durable copy
+        # of its non-volume state.
+        logger.info("Stopping container %s", container_name)
+        container.stop(timeout=30)
+        digest = push.result()
+        logger.info("Removing container %s", container_name)
+        container.remove()
+
+    return {
+        "snapshot_image": _publish_latest(client, project_id, ar_image, digest, auth_config),
+        "last_snapshot_at": time.time(),
+        "status": "stopped",
+    }
 
-    # 2. docker commit
-    logger.info("Committing container %s", container_name)
+
+def checkpoint_project(project_id: str, sa_key_path: str = GCS_KEY_PATH_DEFAULT) -> dict:
+    """Snapshot a running container and leave it running.
+
+    Used for idle projects that aren't due to be stopped yet: docker commit
+    pauses the container only for the commit, and the push runs while it
+    is already serving again. The workspace volume isn't part of the
+    image, and the in-container backup daemon keeps syncing it.
+
+    Returns the same metadata dict as snapshot_project, with
+    status "running".
+    """
+    client = _get_client()
+    container = client.containers.get(f"sandbox-{project_id}")
+
+    logger.info("Checkpointing container sandbox-%s", project_id)
     timestamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
     ar_image = f"{AR_REGISTRY}/{project_id}"
-
     committed = container.commit(repository=ar_image, tag=timestamp)
-    # Also tag as latest
     committed.tag(ar_image, tag="latest")
 
-    # 3. Authenticate and push to AR
     auth_config = _ar_auth_config(sa_key_path)
-    _push_image(client, ar_image, timestamp, auth_config)
-    _push_image(client, ar_image, "latest", auth_config)
-
-    # 4. Stop and remove container (keep volume)
-    logger.info("Stopping and removing container %s", container_name)
-    container.stop(timeout=30)
-    container.remove()
-
-    snapshot_at = time.time()
+    digest = _push_image(client, ar_image, timestamp, auth_config)
 
     return {
-        "snapshot_image": f"{ar_image}:latest",
-        "last_snapshot_at": snapshot_at,
-        "status": "stopped",
+        "snapshot_image": _publish_latest(client, project_id, ar_image, digest, auth_config),
+        "last_snapshot_at": time.time(),
+        "status": "running",
     }
 
 
+def _publish_latest(
+    client: docker.DockerClient, project_id: str, ar_image: str,
+    digest: str | None, auth_config: dict,
+) -> str:
+    """Point AR's latest at a pushed snapshot; return the ref to restore it by.
+
+    The ref is pinned by digest. After the push the daemon records the
+    digest locally, so a same-host restore resolves it without pulling,
+    and it can never pick up a stale local "latest".
+    """
+    if not digest:
+        _push_image(client, ar_image, "latest", auth_config)
+        return f"{ar_image}:latest"
+    _move_latest_tag(project_id, digest)
+    return f"{ar_image}@{digest}"
+
+
 def restore_from_snapshot(
     project_id: str,
     snapshot_image: str,
@@ -156,14 +282,21 @@ def restore_from_snapshot(
     client = _get_client()
 
     # Use local image if available, otherwise pull from AR
-    try:
-        client.images.get(snapshot_image)
-        logger.info("Using local snapshot image %s", snapshot_image)
-    except docker.errors.ImageNotFound:
-        auth_config = _ar_auth_config(sa_key_path)
-        logger.info("Pulling snapshot image %s from AR", snapshot_image)
-        client.images.pull(snapshot_image, auth_config=auth_config)
-        logger.info("Pulled snapshot image %s", snapshot_image)
+    with _local_images_lock:
+        known_local = snapshot_image in _local_images
+    if known_local:
+        logger.info("Using local snapshot image %s (cached)", snapshot_image)
+    else:
+        try:
+            client.images.get(snapshot_image)
+            logger.info("Using local snapshot image %s", snapshot_image)
+        except docker.errors.ImageNotFound:
+            auth_config = _ar_auth_config(sa_key_path)
+            logger.info("Pulling snapshot image %s from AR", snapshot_image)
+            client.images.pull(snapshot_image, auth_config=auth_config)
+            logger.info("Pulled snapshot image %s", snapshot_image)
+        with _local_images_lock:
+            _local_images[snapshot_image] = True
 
     # Create container from snapshot image with existing volume
     container = client.containers.run(
@@ -208,20 +341,15 @@ def restore_from_gcs(
 
     Returns the new container ID.
     """
-    from backend.project_service.services.docker_manager import (
-        create_network,
-        create_volume,
-    )
-
     client = _get_client()
 
     # Create fresh network + volume
     try:
-        create_network(project_id)
+        docker_mgr.create_network(project_id)
     except Exception:
         pass  # Network may already exist
 
-    create_volume(project_id)
+    docker_mgr.create_volume(project_id)
 
     # Create container from base image — entrypoint does GCS restore
     container = client.containers.run(
@@ -260,33 +388,31 @@ def list_snapshots(project_id: str) -> list[dict]:
     parent = f"{AR_PARENT}/packages/{project_id}"
 
     logger.info("[snapshots] Listing tags from AR parent=%s", parent)
+    # Listing the project's own package keeps the filtering server-side;
+    # listing every image in the repository grows with all projects.
     try:
-        images = list(ar_client.list_docker_images(
-            request=artifactregistry_v1.ListDockerImagesRequest(parent=AR_PARENT),
+        tags = list(ar_client.list_tags(
+            request=artifactregistry_v1.ListTagsRequest(parent=parent, page_size=AR_PAGE_SIZE),
+            timeout=AR_LIST_TIMEOUT_SECONDS,
         ))
+    except gcp_exceptions.NotFound:
+        tags = []  # Never snapshotted: no package yet
     except Exception:
-        logger.exception("[snapshots] Failed to list docker images for %s", project_id)
+        logger.exception("[snapshots] Failed to list tags for %s", project_id)
         raise
 
-    logger.info("[snapshots] AR returned %d image(s) in repository", len(images))
-
-    # Filter to images belonging to this project
-    image_prefix = f"{AR_REGISTRY}/{project_id}"
-    snapshots = []
-    for img in images:
-        # img.uri is like "europe-west1-docker.pkg.dev/.../sandboxes/project_id@sha256:..."
-        if not img.uri.startswith(image_prefix):
-            continue
-        for tag in img.tags:
-            if tag == "latest":
-                continue
-            try:
-                created_at = datetime.strptime(tag, "%Y%m%d-%H%M%S").replace(tzinfo=timezone.utc)
-                snapshots.append({"tag": tag, "created_at": created_at})
-            except ValueError:
-                continue
-
-    snapshots.sort(key=lambda s: s["created_at"], reverse=True)
+    logger.info("[snapshots] AR returned %d tag(s) for project", len(tags))
+
+    # ar_tag.name is like ".../packages/{project_id}/tags/{tag}"; "latest"
+    # and other non-timestamp tags parse to None.
+    snapshots = [
+        {"tag": tag, "created_at": created_at}
+        for tag in (ar_tag.name.rsplit("/", 1)[-1] for ar_tag in tags)
+        if (created_at := _tag_created_at(tag)) is not None
+    ]
+
+    # Fixed-width tags sort chronologically as plain strings.
+    snapshots.sort(key=itemgetter("tag"), reverse=True)
     logger.info("[snapshots] Found %d snapshot(s) for project=%s", len(snapshots), project_id)
     return snapshots
 
@@ -300,23 +426,44 @@ def delete_snapshot_images(project_id: str) -> None:
 
     try:
         versions = list(ar_client.list_versions(
-            request=artifactregistry_v1.ListVersionsRequest(parent=package_name),
+            request=artifactregistry_v1.ListVersionsRequest(parent=package_name, page_size=AR_PAGE_SIZE),
+            timeout=AR_LIST_TIMEOUT_SECONDS,
         ))
     except Exception:
         logger.exception("[snapshots] Failed to list versions for %s", project_id)
         return
 
-    for ver in versions:
+    def delete_version(name: str) -> None:
         try:
             ar_client.delete_version(
-                request=artifactregistry_v1.DeleteVersionRequest(name=ver.name, force=True),
+                request=artifactregistry_v1.DeleteVersionRequest(name=name, force=True),
             )
-            logger.info("[snapshots] Deleted version %s", ver.name)
+            logger.info("[snapshots] Deleted version %s", name)
+        except Exception:
+            logger.warning("[snapshots] Failed to delete version %s", name, exc_info=True)
+
+    names = [ver.name for ver in versions]
+    if names:
+        try:
+            # One long-running operation instead of an RPC per version.
+            ar_client.batch_delete_versions(
+                request=artifactregistry_v1.BatchDeleteVersionsRequest(parent=package_name, names=names),
+            ).result(timeout=AR_BATCH_DELETE_TIMEOUT_SECONDS)
+            logger.info("[snapshots] Deleted %d version(s) for %s", len(names), project_id)
         except Exception:
-            logger.warning("[snapshots] Failed to delete version %s", ver.name, exc_info=True)
+            logger.warning(
+                "[snapshots] Batch delete failed for %s, deleting versions one by one",
+                project_id, exc_info=True,
+            )
+            # Each delete is a blocking RPC; bound the fan-out to stay under AR quotas.
+            with ThreadPoolExecutor(max_workers=min(AR_DELETE_WORKERS, len(names))) as pool:
+                list(pool.map(delete_version, names))
 
     # Also clean up local images
     ar_image = f"{AR_REGISTRY}/{project_id}"
+    with _local_images_lock:
+        for ref in [ref for ref in _local_images if ref.startswith(ar_image)]:
+            del _local_images[ref]
     client = _get_client()
     for tag in ["latest", ""]:
         ref = f"{ar_image}:{tag}" if tag else ar_image
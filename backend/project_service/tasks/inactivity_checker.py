@@ -5,20 +5,41 @@ import logging
 import os
 from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import select
+from sqlalchemy import and_, func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.project_service.models.database import Project
 from backend.project_service.services import snapshot_manager as snapshot_mgr
+from backend.project_service.services.docker_executor import run_docker
 
 logger = logging.getLogger(__name__)
 
 IDLE_THRESHOLD_MINUTES = int(os.environ.get("IDLE_THRESHOLD_MINUTES", "30"))
+# Idle projects are stopped after this long. Set it above IDLE_THRESHOLD_MINUTES
+# to checkpoint idle projects first and keep them running until then; by
+# default the two are equal and idle projects are stopped straight away.
+SUSPEND_THRESHOLD_MINUTES = max(
+    int(os.environ.get("SUSPEND_THRESHOLD_MINUTES", str(IDLE_THRESHOLD_MINUTES))),
+    IDLE_THRESHOLD_MINUTES,
+)
 CHECK_INTERVAL_SECONDS = int(os.environ.get("CHECK_INTERVAL_SECONDS", "300"))
 CREDENTIALS_PATH = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", "secrets/project-service-sa.json")
 
 # If a project has been in a transitional state longer than this, consider it stuck
 STUCK_THRESHOLD_MINUTES = int(os.environ.get("STUCK_THRESHOLD_MINUTES", "10"))
+# Lower bound on the loop's sleep, so a just-due project can't make it spin
+MIN_CHECK_INTERVAL_SECONDS = int(os.environ.get("MIN_CHECK_INTERVAL_SECONDS", "5"))
+
+# Auto-snapshots run at the same time, up to this many
+SNAPSHOT_CONCURRENCY = int(os.environ.get("SNAPSHOT_CONCURRENCY", "4"))
+
+TRANSITIONAL_STATUSES = ("snapshotting", "restoring", "creating")
+
+# A project whose checkpoint failed isn't retried for this long, so a
+# persistent failure doesn't commit+push it on every pass.
+CHECKPOINT_RETRY_SECONDS = int(os.environ.get("CHECKPOINT_RETRY_SECONDS", "600"))
+# project id -> earliest retry of a failed checkpoint
+_checkpoint_retry_at: dict = {}
 
 
 async def recover_stuck_projects(db: AsyncSession) -> None:
@@ -30,7 +51,7 @@ async def recover_stuck_projects(db: AsyncSession) -> None:
     cutoff = datetime.now(timezone.utc) - timedelta(minutes=STUCK_THRESHOLD_MINUTES)
     result = await db.execute(
         select(Project).where(
-            Project.status.in_(["snapshotting", "restoring", "creating"]),
+            Project.status.in_(TRANSITIONAL_STATUSES),
             Project.last_active_at < cutoff,
         )
     )
@@ -49,47 +70,189 @@ async def recover_stuck_projects(db: AsyncSession) -> None:
 
 
 async def check_inactive_projects(db: AsyncSession) -> None:
-    """Find and snapshot all running projects idle longer than threshold."""
-    cutoff = datetime.now(timezone.utc) - timedelta(minutes=IDLE_THRESHOLD_MINUTES)
+    """Find and snapshot all running projects idle longer than threshold.
 
-    result = await db.execute(
-        select(Project).where(
+    Projects idle past SUSPEND_THRESHOLD_MINUTES are snapshotted and
+    stopped; those only past IDLE_THRESHOLD_MINUTES are checkpointed.
+    """
+    await checkpoint_idle_projects(db)
+    cutoff = datetime.now(timezone.utc) - timedelta(minutes=SUSPEND_THRESHOLD_MINUTES)
+
+    # Claim the idle projects in one statement: rows another checker has
+    # locked are skipped and claimed rows leave "running", so concurrent
+    # checkers (e.g. during a rolling deploy) never snapshot the same project.
+    idle_ids = (
+        select(Project.id)
+        .where(
             Project.status == "running",
             Project.last_connection_at < cutoff,
         )
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(Project)
+        .where(Project.id.in_(idle_ids))
+        .values(status="snapshotting")
+        .returning(Project)
+        .execution_options(populate_existing=True)
     )
     idle_projects = result.scalars().all()
+    await db.commit()
 
-    for project in idle_projects:
+    async def snapshot(project: Project, db_lock: asyncio.Lock) -> None:
         logger.info("Auto-snapshotting idle project %s (last connection: %s)",
-                     project.id, project.last_connection_at)
+                    project.id, project.last_connection_at)
         try:
-            project.status = "snapshotting"
-            await db.commit()
-
-            snap_result = await asyncio.to_thread(
+            snap_result = await run_docker(
                 snapshot_mgr.snapshot_project, str(project.id), CREDENTIALS_PATH,
             )
-            project.snapshot_image = snap_result["snapshot_image"]
-            project.last_snapshot_at = datetime.fromtimestamp(
-                snap_result["last_snapshot_at"], tz=timezone.utc
-            )
-            project.last_backup_at = project.last_snapshot_at
-            project.status = "stopped"
-            await db.commit()
+            async with db_lock:
+                project.snapshot_image = snap_result["snapshot_image"]
+                project.last_snapshot_at = datetime.fromtimestamp(
+                    snap_result["last_snapshot_at"], tz=timezone.utc
+                )
+                project.last_backup_at = project.last_snapshot_at
+                project.status = "stopped"
+                await db.commit()
         except Exception as e:
             logger.error("Auto-snapshot failed for %s: %s", project.id, e)
-            project.status = "error"
+            async with db_lock:
+                project.status = "error"
+                await db.commit()
+
+    await _bounded_gather(idle_projects, snapshot)
+
+
+async def _bounded_gather(items, fn) -> None:
+    """Await fn(item, db_lock) for every item, SNAPSHOT_CONCURRENCY at a time.
+
+    Snapshots are slow Docker/registry I/O, so several run at once. They
+    share one session, which can't run concurrent operations, so fn must
+    do its DB work under db_lock.
+    """
+    semaphore = asyncio.Semaphore(SNAPSHOT_CONCURRENCY)
+    db_lock = asyncio.Lock()
+
+    async def run(item) -> None:
+        async with semaphore:
+            await fn(item, db_lock)
+
+    await asyncio.gather(*(run(item) for item in items))
+
+
+def _backed_off_projects(now: datetime) -> list:
+    """Projects whose failed checkpoint isn't due for a retry yet."""
+    for project_id, retry_at in list(_checkpoint_retry_at.items()):
+        if retry_at <= now:
+            del _checkpoint_retry_at[project_id]
+    return list(_checkpoint_retry_at)
+
+
+def _needs_checkpoint(now: datetime):
+    """Running projects with no snapshot since their last connection,
+    except those backing off after a failed checkpoint."""
+    cond = and_(
+        Project.status == "running",
+        or_(Project.last_snapshot_at.is_(None), Project.last_snapshot_at < Project.last_connection_at),
+    )
+    if backed_off := _backed_off_projects(now):
+        cond = and_(cond, Project.id.not_in(backed_off))
+    return cond
+
+
+async def checkpoint_idle_projects(db: AsyncSession) -> None:
+    """Checkpoint projects idle past IDLE_THRESHOLD_MINUTES without stopping them.
+
+    A no-op unless SUSPEND_THRESHOLD_MINUTES is set above the idle threshold.
+    """
+    if SUSPEND_THRESHOLD_MINUTES == IDLE_THRESHOLD_MINUTES:
+        return
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(minutes=IDLE_THRESHOLD_MINUTES)
+    result = await db.execute(
+        select(Project.id, Project.last_connection_at).where(
+            _needs_checkpoint(now), Project.last_connection_at < cutoff,
+        )
+    )
+    idle = result.all()
+    await db.commit()  # don't hold a connection across the pushes
+
+    async def checkpoint(row, db_lock: asyncio.Lock) -> None:
+        project_id, last_connection_at = row
+        logger.info("Checkpointing idle project %s (last connection: %s)",
+                    project_id, last_connection_at)
+        try:
+            snap_result = await run_docker(
+                snapshot_mgr.checkpoint_project, str(project_id), CREDENTIALS_PATH,
+            )
+        except Exception as e:
+            logger.error("Checkpoint failed for %s: %s", project_id, e)
+            # Still running; retried after the backoff
+            _checkpoint_retry_at[project_id] = (
+                datetime.now(timezone.utc) + timedelta(seconds=CHECKPOINT_RETRY_SECONDS)
+            )
+            return
+        _checkpoint_retry_at.pop(project_id, None)
+        snapshot_at = datetime.fromtimestamp(snap_result["last_snapshot_at"], tz=timezone.utc)
+        # Only while still running: a user stop that raced the
+        # checkpoint has recorded a newer snapshot.
+        async with db_lock:
+            await db.execute(
+                update(Project)
+                .where(Project.id == project_id, Project.status == "running")
+                .values(
+                    snapshot_image=snap_result["snapshot_image"],
+                    last_snapshot_at=snapshot_at,
+                    last_backup_at=snapshot_at,
+                )
+            )
             await db.commit()
 
+    await _bounded_gather(idle, checkpoint)
+
+
+async def seconds_until_next_check(db: AsyncSession) -> float:
+    """Seconds until the next project can become idle or stuck.
+
+    Capped at CHECK_INTERVAL_SECONDS (which also covers projects that start
+    or connect after this query) and floored at MIN_CHECK_INTERVAL_SECONDS.
+    """
+    now = datetime.now(timezone.utc)
+    result = await db.execute(
+        select(
+            func.min(Project.last_connection_at).filter(Project.status == "running"),
+            func.min(Project.last_connection_at).filter(_needs_checkpoint(now)),
+            func.min(Project.last_active_at).filter(Project.status.in_(TRANSITIONAL_STATUSES)),
+        )
+    )
+    oldest_connection, oldest_unsaved, oldest_transition = result.one()
+
+    due = [now + timedelta(seconds=CHECK_INTERVAL_SECONDS)]
+    if oldest_connection is not None:
+        due.append(oldest_connection + timedelta(minutes=SUSPEND_THRESHOLD_MINUTES))
+    if SUSPEND_THRESHOLD_MINUTES > IDLE_THRESHOLD_MINUTES:
+        if oldest_unsaved is not None:
+            due.append(oldest_unsaved + timedelta(minutes=IDLE_THRESHOLD_MINUTES))
+        if _checkpoint_retry_at:
+            due.append(min(_checkpoint_retry_at.values()))
+    if oldest_transition is not None:
+        due.append(oldest_transition + timedelta(minutes=STUCK_THRESHOLD_MINUTES))
+    return max((min(due) - now).total_seconds(), MIN_CHECK_INTERVAL_SECONDS)
+
 
 async def run_inactivity_checker_loop(session_factory) -> None:
-    """Run the inactivity checker in an infinite loop. Called from app startup."""
+    """Run the inactivity checker in an infinite loop. Called from app startup.
+
+    Sleeps until the next project is due rather than a fixed interval, so
+    idle projects are snapshotted close to the threshold.
+    """
     while True:
+        delay = CHECK_INTERVAL_SECONDS
         try:
             async with session_factory() as db:
                 await recover_stuck_projects(db)
                 await check_inactive_projects(db)
+                delay = await seconds_until_next_check(db)
         except Exception as e:
             logger.error("Inactivity checker error: %s", e)
-        await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+        await asyncio.sleep(delay)
@@ -8,6 +8,10 @@ from unittest.mock import MagicMock
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
 from testcontainers.postgres import PostgresContainer
 
 # Postgres container — started once per session
@@ -30,15 +34,63 @@ for _mod in [
 
 
 def pytest_configure(config):
-    """Start Postgres container once for the entire test session."""
+    """Start Postgres container once for the entire test session.
+
+    Set TEST_DATABASE_URL to reuse an already-running Postgres instead
+    (e.g. a long-lived local container); its tables are dropped and recreated.
+
+    Under pytest-xdist (``-n auto``) each worker is isolated: it starts its
+    own container, or with TEST_DATABASE_URL uses its own database on that
+    server.
+    """
     global _pg_container
-    _pg_container = PostgresContainer("postgres:16-alpine", dbname="test_sandboxes", username="test", password="test")
-    _pg_container.start()
-    host = _pg_container.get_container_host_ip()
-    port = _pg_container.get_exposed_port(5432)
-    os.environ["DATABASE_URL"] = (
-        f"postgresql+asyncpg://test:test@{host}:{port}/test_sandboxes"
-    )
+    if getattr(config.option, "numprocesses", None) and not hasattr(config, "workerinput"):
+        return  # pytest-xdist controller: only the workers use the database
+    url = os.environ.get("TEST_DATABASE_URL")
+    worker = os.environ.get("PYTEST_XDIST_WORKER")
+    if url and worker:
+        # Workers share the server but each gets its own database.
+        url = asyncio.run(_create_worker_database(url, worker))
+    elif not url:
+        _pg_container = PostgresContainer("postgres:16-alpine", dbname="test_sandboxes", username="test", password="test")
+        _pg_container.start()
+        host = _pg_container.get_container_host_ip()
+        port = _pg_container.get_exposed_port(5432)
+        url = f"postgresql+asyncpg://test:test@{host}:{port}/test_sandboxes"
+    os.environ["DATABASE_URL"] = url
+    # Cheap password hashing; must be set before auth_service is imported.
+    os.environ.setdefault("ARGON2_TIME_COST", "1")
+    os.environ.setdefault("ARGON2_MEMORY_COST", "64")
+    asyncio.run(_create_schema(os.environ["DATABASE_URL"]))
+
+
+async def _create_worker_database(url: str, worker: str) -> str:
+    """Create ``<database>_<worker>`` next to ``url``'s database if missing."""
+    base = make_url(url)
+    name = f"{base.database}_{worker}"
+    engine = create_async_engine(base, poolclass=NullPool, isolation_level="AUTOCOMMIT")
+    async with engine.connect() as conn:
+        exists = await conn.scalar(
+            text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": name},
+        )
+        if not exists:
+            await conn.execute(text(f'CREATE DATABASE "{name}"'))
+    await engine.dispose()
+    return base.set(database=name).render_as_string(hide_password=False)
+
+
+async def _create_schema(url: str) -> None:
+    """Create the tables once per session; tests only truncate them.
+
+    Uses a throwaway engine so the app engine's pool never sees this loop.
+    """
+    from backend.project_service.models.database import Base
+
+    engine = create_async_engine(url, poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
 
 
 def pytest_unconfigure(config):
@@ -55,51 +107,65 @@ def event_loop():
 
 
 @pytest_asyncio.fixture
-async def db():
-    """Yield a clean DB session. Tables are recreated per-test."""
-    # Import after DATABASE_URL is set
-    from backend.project_service.models.database import Base, engine, async_session
+async def _connection():
+    """One connection per test, inside a transaction rolled back afterwards."""
+    from backend.project_service.models.database import engine
 
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
+    async with engine.connect() as conn:
+        trans = await conn.begin()
+        yield conn
+        await trans.rollback()
+
+
+def _session(conn) -> AsyncSession:
+    """A session on the test's connection; its commits release savepoints."""
+    return AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
 
-    async with async_session() as session:
+
+@pytest_asyncio.fixture
+async def db(_connection):
+    """Yield a clean DB session. Each test's writes are rolled back."""
+    async with _session(_connection) as session:
         yield session
 
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
+
+@pytest.fixture(scope="session")
+def _asgi_client():
+    """One AsyncClient for the whole session; ASGITransport holds no
+    connections, so there is nothing to close between tests."""
+    from backend.project_service.main import app
+
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
 
 
 @pytest_asyncio.fixture
-async def client(db):
+async def client(db, _connection, _asgi_client):
     """Async HTTP test client for the FastAPI app."""
     from backend.project_service.main import app
-    from backend.project_service.models.database import get_db, async_session
+    from backend.project_service.models.database import get_db
 
     async def _override_get_db():
-        async with async_session() as session:
+        async with _session(_connection) as session:
             yield session
 
     app.dependency_overrides[get_db] = _override_get_db
+    _asgi_client.cookies.clear()
 
-    transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://test") as ac:
-        yield ac
+    yield _asgi_client
 
-    app.dependency_overrides.clear()
+    app.dependency_overrides.pop(get_db, None)
 
 
 @pytest_asyncio.fixture
-async def auth_headers(client):
-    """Register a user and return auth headers with a valid access token."""
-    await client.post("/auth/register", json={
-        "email": "testuser@example.com",
-        "password": "SecurePass123!",
-    })
-    resp = await client.post("/auth/login", json={
-        "email": "testuser@example.com",
-        "password": "SecurePass123!",
-    })
-    token = resp.json()["access_token"]
+async def auth_headers(db):
+    """Create a user and return auth headers with a valid access token."""
+    import uuid
+
+    from backend.project_service.models.database import User
+    from backend.project_service.services.auth_service import create_access_token
+
+    user = User(id=uuid.uuid4(), email="testuser@example.com", password_hash="$2b$12$fakehashfakehashfakehashfakehashfakehashfakehashfake")
+    db.add(user)
+    await db.commit()
+    token = create_access_token(str(user.id))
     return {"Authorization": f"Bearer {token}"}
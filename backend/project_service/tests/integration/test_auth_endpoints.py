@@ -17,14 +17,14 @@ class TestRegister:
         data = resp.json()
         assert "user_id" in data
 
-        # Verify user in DB with bcrypt hash
+        # Verify user in DB with argon2 hash
         from backend.project_service.models.database import User
         from sqlalchemy import select
         result = await db.execute(select(User).where(User.email == "new@example.com"))
         user = result.scalar_one()
         assert user is not None
         assert user.password_hash != "SecurePass123!"
-        assert user.password_hash.startswith("$2b$")
+        assert user.password_hash.startswith("$argon2id$")
 
     async def test_register_duplicate_email(self, client, db):
         """T8.2: Second registration with same email returns 409."""
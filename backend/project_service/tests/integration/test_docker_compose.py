@@ -13,27 +13,39 @@ COMPOSE_FILE = os.path.join(
 )
 
 
+# Shelling out to the docker CLI is slow and needs a daemon; opt in.
+docker_available = os.environ.get("DOCKER_TESTS", "0") == "1"
+skip_no_docker = pytest.mark.skipif(
+    not docker_available,
+    reason="Set DOCKER_TESTS=1 to run Docker integration tests",
+)
+
+# libyaml's C loader when available; much faster than the pure-Python one.
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@pytest.fixture(scope="module")
+def data():
+    """docker-compose.yml, parsed once for the module."""
+    with open(COMPOSE_FILE) as f:
+        return yaml.load(f, Loader=_YAML_LOADER)
+
+
 class TestDockerCompose:
 
     def test_compose_file_exists(self):
         assert os.path.isfile(COMPOSE_FILE), f"docker-compose.yml not found at {COMPOSE_FILE}"
 
-    def test_compose_valid_yaml(self):
-        with open(COMPOSE_FILE) as f:
-            data = yaml.safe_load(f)
+    def test_compose_valid_yaml(self, data):
         assert data is not None
 
-    def test_compose_has_required_services(self):
-        with open(COMPOSE_FILE) as f:
-            data = yaml.safe_load(f)
+    def test_compose_has_required_services(self, data):
         services = data.get("services", {})
         assert "project-service" in services, "Missing project-service"
         assert "postgres" in services, "Missing postgres"
         assert "terminal-proxy" in services, "Missing terminal-proxy"
 
-    def test_project_service_config(self):
-        with open(COMPOSE_FILE) as f:
-            data = yaml.safe_load(f)
+    def test_project_service_config(self, data):
         ps = data["services"]["project-service"]
         # Must mount docker socket for container management
         volumes = ps.get("volumes", [])
@@ -49,18 +61,14 @@ class TestDockerCompose:
         else:
             assert "postgres" in depends
 
-    def test_postgres_config(self):
-        with open(COMPOSE_FILE) as f:
-            data = yaml.safe_load(f)
+    def test_postgres_config(self, data):
         pg = data["services"]["postgres"]
         assert pg.get("image", "").startswith("postgres:"), "postgres must use postgres image"
         # Must have persistent volume
         volumes = pg.get("volumes", [])
         assert len(volumes) > 0, "postgres must have persistent volume"
 
-    def test_terminal_proxy_config(self):
-        with open(COMPOSE_FILE) as f:
-            data = yaml.safe_load(f)
+    def test_terminal_proxy_config(self, data):
         tp = data["services"]["terminal-proxy"]
         # Must use host network mode
         assert tp.get("network_mode") == "host", "terminal-proxy must use host network"
@@ -69,6 +77,7 @@ class TestDockerCompose:
         assert any("/var/run/docker.sock" in str(v) for v in volumes), \
             "terminal-proxy must mount Docker socket"
 
+    @skip_no_docker
     def test_compose_config_validates(self):
         """docker compose config validates the file without errors."""
         result = subprocess.run(
@@ -77,14 +86,10 @@ class TestDockerCompose:
         )
         assert result.returncode == 0, f"docker compose config failed: {result.stderr}"
 
-    def test_platform_network_defined(self):
-        with open(COMPOSE_FILE) as f:
-            data = yaml.safe_load(f)
+    def test_platform_network_defined(self, data):
         networks = data.get("networks", {})
         assert "platform-net" in networks, "Must define platform-net network"
 
-    def test_postgres_volume_defined(self):
-        with open(COMPOSE_FILE) as f:
-            data = yaml.safe_load(f)
+    def test_postgres_volume_defined(self, data):
         volumes = data.get("volumes", {})
         assert "postgres-data" in volumes, "Must define postgres-data volume"
@@ -1,88 +1,170 @@
 """Integration tests for the inactivity checker background task (T8.24-T8.26)."""
 
-import uuid
 import time
 from datetime import datetime, timedelta, timezone
-from unittest.mock import patch
+from unittest.mock import MagicMock
 
 import pytest
 
 from backend.project_service.models.database import Project, User
+from backend.project_service.tasks import inactivity_checker
 
 pytestmark = pytest.mark.asyncio
 
 THIRTY_ONE_MIN_AGO = datetime.now(timezone.utc) - timedelta(minutes=31)
 FOUR_MIN_AGO = datetime.now(timezone.utc) - timedelta(minutes=4)
+GCS_PREFIX = "fixture-prefix/workspace"
 
 
-async def _insert_project(db, user_id, name, status, last_connection_at):
-    p = Project(
+@pytest.fixture
+def mock_snap(monkeypatch):
+    """snapshot_mgr as seen by the inactivity checker."""
+    mock = MagicMock()
+    monkeypatch.setattr(inactivity_checker, "snapshot_mgr", mock)
+    return mock
+
+
+async def _bulk_insert(db, *objs):
+    """Insert rows in one commit. Column defaults are client-side, so no refresh is needed."""
+    db.add_all(objs)
+    await db.commit()
+
+
+def _project(user_id, name, status, last_connection_at):
+    return Project(
         user_id=user_id, name=name, status=status,
         ssh_public_key="pub", ssh_private_key="priv",
-        gcs_prefix=f"{uuid.uuid4()}/workspace",
+        gcs_prefix=GCS_PREFIX,
         container_id="cid",
         last_connection_at=last_connection_at,
     )
-    db.add(p)
-    await db.commit()
-    await db.refresh(p)
+
+
+async def _insert_project(db, user_id, name, status, last_connection_at):
+    p = _project(user_id, name, status, last_connection_at)
+    await _bulk_insert(db, p)
     return p
 
 
 async def _create_user(db, email):
     user = User(email=email, password_hash="$2b$12$fakehashfakehashfakehashfakehashfakehashfakehashfake")
-    db.add(user)
-    await db.commit()
-    await db.refresh(user)
+    await _bulk_insert(db, user)
     return user
 
 
 class TestInactivityChecker:
 
-    async def test_identifies_idle_projects(self, db):
+    async def test_identifies_idle_projects(self, db, mock_snap):
         """T8.24: Running project idle > 30 min gets snapshotted and stopped."""
         from backend.project_service.tasks.inactivity_checker import check_inactive_projects
 
         user = await _create_user(db, "idle@example.com")
         project = await _insert_project(db, user.id, "Idle", "running", THIRTY_ONE_MIN_AGO)
 
-        with patch("backend.project_service.tasks.inactivity_checker.snapshot_mgr") as mock_snap:
-            mock_snap.snapshot_project.return_value = {
-                "snapshot_image": "registry/img:latest",
-                "last_snapshot_at": time.time(),
-                "status": "stopped",
-            }
-            await check_inactive_projects(db)
+        mock_snap.snapshot_project.return_value = {
+            "snapshot_image": "registry/img:latest",
+            "last_snapshot_at": time.time(),
+            "status": "stopped",
+        }
+        await check_inactive_projects(db)
 
         await db.refresh(project)
         assert project.status == "stopped"
         assert project.snapshot_image == "registry/img:latest"
         mock_snap.snapshot_project.assert_called_once()
 
-    async def test_skips_active_projects(self, db):
+    async def test_snapshots_several_idle_projects(self, db, mock_snap):
+        """Idle projects are snapshotted concurrently; a failure doesn't stop the others."""
+        from backend.project_service.tasks.inactivity_checker import check_inactive_projects
+
+        user = await _create_user(db, "idle-many@example.com")
+        ok = _project(user.id, "IdleOk", "running", THIRTY_ONE_MIN_AGO)
+        bad = _project(user.id, "IdleBad", "running", THIRTY_ONE_MIN_AGO)
+        await _bulk_insert(db, ok, bad)
+
+        def fake_snapshot(project_id, _creds):
+            if project_id == str(bad.id):
+                raise RuntimeError("push failed")
+            return {"snapshot_image": "registry/img:latest", "last_snapshot_at": time.time(), "status": "stopped"}
+
+        mock_snap.snapshot_project.side_effect = fake_snapshot
+        await check_inactive_projects(db)
+
+        await db.refresh(ok)
+        await db.refresh(bad)
+        assert ok.status == "stopped"
+        assert bad.status == "error"
+        assert mock_snap.snapshot_project.call_count == 2
+
+    async def test_skips_active_projects(self, db, mock_snap):
         """T8.25: Recently active project is not snapshotted."""
         from backend.project_service.tasks.inactivity_checker import check_inactive_projects
 
         user = await _create_user(db, "active@example.com")
         project = await _insert_project(db, user.id, "Active", "running", FOUR_MIN_AGO)
 
-        with patch("backend.project_service.tasks.inactivity_checker.snapshot_mgr") as mock_snap:
-            await check_inactive_projects(db)
+        await check_inactive_projects(db)
 
         await db.refresh(project)
         assert project.status == "running"
         mock_snap.snapshot_project.assert_not_called()
 
-    async def test_skips_non_running_projects(self, db):
+    async def test_skips_non_running_projects(self, db, mock_snap):
         """T8.26: Already stopped project with old last_connection_at is not processed."""
         from backend.project_service.tasks.inactivity_checker import check_inactive_projects
 
         user = await _create_user(db, "stopped@example.com")
         project = await _insert_project(db, user.id, "Stopped", "stopped", THIRTY_ONE_MIN_AGO)
 
-        with patch("backend.project_service.tasks.inactivity_checker.snapshot_mgr") as mock_snap:
-            await check_inactive_projects(db)
+        await check_inactive_projects(db)
 
         await db.refresh(project)
         assert project.status == "stopped"
         mock_snap.snapshot_project.assert_not_called()
+
+    async def test_next_check_waits_for_next_idle_project(self, db):
+        """Loop sleeps until the oldest running project crosses the threshold."""
+        from backend.project_service.tasks.inactivity_checker import seconds_until_next_check
+
+        user = await _create_user(db, "nextdue@example.com")
+        almost_idle = datetime.now(timezone.utc) - timedelta(minutes=29)
+        await _insert_project(db, user.id, "AlmostIdle", "running", almost_idle)
+
+        delay = await seconds_until_next_check(db)
+        assert 5 <= delay <= 60
+
+    async def test_checkpoints_before_suspend_threshold(self, db, mock_snap, monkeypatch):
+        """With a later suspend threshold, idle projects are checkpointed and keep running."""
+        user = await _create_user(db, "checkpoint@example.com")
+        project = await _insert_project(db, user.id, "Checkpoint", "running", THIRTY_ONE_MIN_AGO)
+
+        monkeypatch.setattr(inactivity_checker, "SUSPEND_THRESHOLD_MINUTES", 120)
+        mock_snap.checkpoint_project.return_value = {
+            "snapshot_image": "registry/img@sha256:abc",
+            "last_snapshot_at": time.time(),
+            "status": "running",
+        }
+        await inactivity_checker.check_inactive_projects(db)
+        # Already checkpointed since the last connection: not repeated.
+        await inactivity_checker.check_inactive_projects(db)
+
+        await db.refresh(project)
+        assert project.status == "running"
+        assert project.snapshot_image == "registry/img@sha256:abc"
+        mock_snap.checkpoint_project.assert_called_once()
+        mock_snap.snapshot_project.assert_not_called()
+
+    async def test_failed_checkpoint_backs_off(self, db, mock_snap, monkeypatch):
+        """A failing checkpoint isn't retried on every pass at the loop's floor interval."""
+        user = await _create_user(db, "checkpoint-fail@example.com")
+        await _insert_project(db, user.id, "CheckpointFail", "running", THIRTY_ONE_MIN_AGO)
+
+        monkeypatch.setattr(inactivity_checker, "SUSPEND_THRESHOLD_MINUTES", 120)
+        monkeypatch.setattr(inactivity_checker, "_checkpoint_retry_at", {})
+        mock_snap.checkpoint_project.side_effect = RuntimeError("push failed")
+        await inactivity_checker.check_inactive_projects(db)
+        await inactivity_checker.check_inactive_projects(db)
+
+        mock_snap.checkpoint_project.assert_called_once()
+        delay = await inactivity_checker.seconds_until_next_check(db)
+        assert delay > inactivity_checker.MIN_CHECK_INTERVAL_SECONDS
@@ -5,24 +5,62 @@ Docker/GCP services are mocked — we test the API layer.
 
 import uuid
 import time
-from unittest.mock import patch
+from unittest.mock import MagicMock
 from datetime import datetime, timezone
 
 import pytest
 
 from backend.project_service.models.database import Project, User
-from backend.project_service.services.auth_service import decode_access_token
+from backend.project_service.services import project_service
+from backend.project_service.services.auth_service import create_access_token
 
 pytestmark = pytest.mark.asyncio
 
+# Each test's rows are rolled back, so prefixes needn't be unique.
+GCS_PREFIX = "fixture-prefix/workspace"
+NOW = datetime.now(timezone.utc)
+# Never checked: these users get their tokens without logging in.
+FAKE_PASSWORD_HASH = "$2b$12$fakehashfakehashfakehashfakehashfakehashfakehashfake"
 
-async def _register_and_login(client, email="user@example.com"):
-    """Helper: register + login, return (headers, user_id)."""
-    await client.post("/auth/register", json={"email": email, "password": "SecurePass123!"})
-    resp = await client.post("/auth/login", json={"email": email, "password": "SecurePass123!"})
-    data = resp.json()
-    user_id = decode_access_token(data["access_token"])["sub"]
-    return {"Authorization": f"Bearer {data['access_token']}"}, user_id
+
+@pytest.fixture
+def mock_iam(monkeypatch):
+    """gcp_iam as seen by project_service, with a provisionable user's defaults."""
+    mock = MagicMock()
+    mock.make_bucket_name.return_value = "test-bucket"
+    mock.create_service_account.return_value = "sa@test.iam"
+    mock.create_sa_key.return_value = '{"type":"service_account"}'
+    monkeypatch.setattr(project_service, "gcp_iam", mock)
+    return mock
+
+
+@pytest.fixture
+def mock_docker(monkeypatch):
+    """docker_mgr as seen by project_service; containers come up on port 30001."""
+    mock = MagicMock()
+    mock.create_container.return_value = ("cid-123", 30001)
+    monkeypatch.setattr(project_service, "docker_mgr", mock)
+    return mock
+
+
+@pytest.fixture
+def mock_snap(monkeypatch):
+    """snapshot_mgr as seen by project_service."""
+    mock = MagicMock()
+    monkeypatch.setattr(project_service, "snapshot_mgr", mock)
+    return mock
+
+
+async def _make_user(db, email="user@example.com"):
+    """Helper: insert a user and mint a token directly, return (headers, user_id).
+
+    Skips the /auth round-trips; those endpoints are covered in test_auth_endpoints.
+    """
+    user = User(id=uuid.uuid4(), email=email, password_hash=FAKE_PASSWORD_HASH)
+    db.add(user)
+    await db.commit()
+    token = create_access_token(str(user.id))
+    return {"Authorization": f"Bearer {token}"}, str(user.id)
 
 
 async def _set_user_gcp(db, user_id):
@@ -40,14 +78,14 @@ class TestListProjects:
 
     async def test_list_only_own_projects(self, client, db):
         """T8.10: User A sees only their projects, not user B's."""
-        headers_a, user_a_id = await _register_and_login(client, "a@example.com")
-        headers_b, user_b_id = await _register_and_login(client, "b@example.com")
+        headers_a, user_a_id = await _make_user(db, "a@example.com")
+        headers_b, user_b_id = await _make_user(db, "b@example.com")
 
         for name, uid in [("A-proj", user_a_id), ("B-proj", user_b_id)]:
             p = Project(
                 user_id=uuid.UUID(uid), name=name, status="running",
                 ssh_public_key="pub", ssh_private_key="priv",
-                gcs_prefix=f"{uuid.uuid4()}/workspace",
+                gcs_prefix=GCS_PREFIX,
             )
             db.add(p)
         await db.commit()
@@ -59,26 +97,25 @@ class TestListProjects:
         assert projects[0]["name"] == "A-proj"
         assert all(k in projects[0] for k in ["id", "name", "status", "created_at"])
 
+    async def test_list_requires_valid_token(self, client, db):
+        resp = await client.get("/projects")
+        assert resp.status_code == 401
 
-class TestCreateProject:
+        resp = await client.get("/projects", headers={"Authorization": "Bearer garbage"})
+        assert resp.status_code == 401
 
-    async def test_create_project(self, client, db):
-        """T8.11: Create returns 201 with project details, container running."""
-        headers, user_id = await _register_and_login(client, "creator@example.com")
 
-        with patch("backend.project_service.services.project_service.gcp_iam") as mock_iam, \
-             patch("backend.project_service.services.project_service.docker_mgr") as mock_docker:
+class TestCreateProject:
 
-            mock_iam.make_bucket_name.return_value = "test-bucket"
-            mock_iam.create_service_account.return_value = "sa@test.iam"
-            mock_iam.create_sa_key.return_value = '{"type":"service_account"}'
-            mock_docker.create_container.return_value = ("cid-123", 30001)
+    async def test_create_project(self, client, db, mock_iam, mock_docker):
+        """T8.11: Create returns 201 with project details, container running."""
+        headers, user_id = await _make_user(db, "creator@example.com")
 
-            resp = await client.post(
-                "/projects",
-                json={"name": "My Agent"},
-                headers=headers,
-            )
+        resp = await client.post(
+            "/projects",
+            json={"name": "My Agent"},
+            headers=headers,
+        )
 
         assert resp.status_code == 201
         data = resp.json()
@@ -93,12 +130,12 @@ class TestGetProject:
 
     async def test_get_project_details(self, client, db):
         """T8.12: Get owned project returns full details."""
-        headers, user_id = await _register_and_login(client, "getter@example.com")
+        headers, user_id = await _make_user(db, "getter@example.com")
 
         project = Project(
             user_id=uuid.UUID(user_id), name="Detail Test", status="running",
             ssh_public_key="pub", ssh_private_key="priv",
-            gcs_prefix=f"{uuid.uuid4()}/workspace", ssh_host_port=30001,
+            gcs_prefix=GCS_PREFIX, ssh_host_port=30001,
         )
         db.add(project)
         await db.commit()
@@ -114,13 +151,13 @@ class TestGetProject:
 
     async def test_get_project_wrong_user(self, client, db):
         """T8.13: Non-owner gets 404 (not 403)."""
-        headers_a, user_a_id = await _register_and_login(client, "owner2@example.com")
-        headers_b, _ = await _register_and_login(client, "intruder@example.com")
+        headers_a, user_a_id = await _make_user(db, "owner2@example.com")
+        headers_b, _ = await _make_user(db, "intruder@example.com")
 
         project = Project(
             user_id=uuid.UUID(user_a_id), name="Owner's Project", status="running",
             ssh_public_key="pub", ssh_private_key="priv",
-            gcs_prefix=f"{uuid.uuid4()}/workspace",
+            gcs_prefix=GCS_PREFIX,
         )
         db.add(project)
         await db.commit()
@@ -132,26 +169,25 @@ class TestGetProject:
 
 class TestStopProject:
 
-    async def test_stop_project(self, client, db):
+    async def test_stop_project(self, client, db, mock_snap):
         """T8.14: Stop snapshots and stops container."""
-        headers, user_id = await _register_and_login(client, "stopper@example.com")
+        headers, user_id = await _make_user(db, "stopper@example.com")
 
         project = Project(
             user_id=uuid.UUID(user_id), name="To Stop", status="running",
             ssh_public_key="pub", ssh_private_key="priv",
-            gcs_prefix=f"{uuid.uuid4()}/workspace", container_id="cid",
+            gcs_prefix=GCS_PREFIX, container_id="cid",
         )
         db.add(project)
         await db.commit()
         await db.refresh(project)
 
-        with patch("backend.project_service.services.project_service.snapshot_mgr") as mock_snap:
-            mock_snap.snapshot_project.return_value = {
-                "snapshot_image": "registry/img:latest",
-                "last_snapshot_at": time.time(),
-                "status": "stopped",
-            }
-            resp = await client.post(f"/projects/{project.id}/stop", headers=headers)
+        mock_snap.snapshot_project.return_value = {
+            "snapshot_image": "registry/img:latest",
+            "last_snapshot_at": time.time(),
+            "status": "stopped",
+        }
+        resp = await client.post(f"/projects/{project.id}/stop", headers=headers)
 
         assert resp.status_code == 200
         data = resp.json()
@@ -161,24 +197,23 @@ class TestStopProject:
 
 class TestStartProject:
 
-    async def test_start_stopped_project(self, client, db):
+    async def test_start_stopped_project(self, client, db, mock_snap):
         """T8.15: Start restores a stopped project."""
-        headers, user_id = await _register_and_login(client, "starter@example.com")
+        headers, user_id = await _make_user(db, "starter@example.com")
         await _set_user_gcp(db, user_id)
 
         project = Project(
             user_id=uuid.UUID(user_id), name="To Start", status="stopped",
             ssh_public_key="pub", ssh_private_key="priv",
-            gcs_prefix=f"{uuid.uuid4()}/workspace", snapshot_image="registry/img:latest",
+            gcs_prefix=GCS_PREFIX, snapshot_image="registry/img:latest",
         )
         db.add(project)
         await db.commit()
         await db.refresh(project)
 
-        with patch("backend.project_service.services.project_service.snapshot_mgr") as mock_snap:
-            mock_snap.restore_image_for_project.return_value = "registry/img:latest"
-            mock_snap.restore_from_snapshot.return_value = "new-cid-456"
-            resp = await client.post(f"/projects/{project.id}/start", headers=headers)
+        mock_snap.restore_image_for_project.return_value = "registry/img:latest"
+        mock_snap.restore_from_snapshot.return_value = "new-cid-456"
+        resp = await client.post(f"/projects/{project.id}/start", headers=headers)
 
         assert resp.status_code == 200
         data = resp.json()
@@ -187,14 +222,14 @@ class TestStartProject:
 
 class TestListSnapshots:
 
-    async def test_list_snapshots(self, client, db):
+    async def test_list_snapshots(self, client, db, mock_snap):
         """GET /snapshots returns snapshot list for owned project."""
-        headers, user_id = await _register_and_login(client, "snaplist@example.com")
+        headers, user_id = await _make_user(db, "snaplist@example.com")
 
         project = Project(
             user_id=uuid.UUID(user_id), name="Snap List", status="stopped",
             ssh_public_key="pub", ssh_private_key="priv",
-            gcs_prefix=f"{uuid.uuid4()}/workspace",
+            gcs_prefix=GCS_PREFIX,
         )
         db.add(project)
         await db.commit()
@@ -204,9 +239,8 @@ class TestListSnapshots:
             {"tag": "20260223-143015", "created_at": datetime(2026, 2, 23, 14, 30, 15, tzinfo=timezone.utc)},
             {"tag": "20260223-100000", "created_at": datetime(2026, 2, 23, 10, 0, 0, tzinfo=timezone.utc)},
         ]
-        with patch("backend.project_service.services.project_service.snapshot_mgr") as mock_snap:
-            mock_snap.list_snapshots.return_value = mock_data
-            resp = await client.get(f"/projects/{project.id}/snapshots", headers=headers)
+        mock_snap.list_snapshots.return_value = mock_data
+        resp = await client.get(f"/projects/{project.id}/snapshots", headers=headers)
 
         assert resp.status_code == 200
         data = resp.json()
@@ -216,13 +250,13 @@ class TestListSnapshots:
 
     async def test_list_snapshots_wrong_user(self, client, db):
         """GET /snapshots for non-owned project returns 404."""
-        headers_a, user_a_id = await _register_and_login(client, "snapowner@example.com")
-        headers_b, _ = await _register_and_login(client, "snapintruder@example.com")
+        headers_a, user_a_id = await _make_user(db, "snapowner@example.com")
+        headers_b, _ = await _make_user(db, "snapintruder@example.com")
 
         project = Project(
             user_id=uuid.UUID(user_a_id), name="Owner Snaps", status="stopped",
             ssh_public_key="pub", ssh_private_key="priv",
-            gcs_prefix=f"{uuid.uuid4()}/workspace",
+            gcs_prefix=GCS_PREFIX,
         )
         db.add(project)
         await db.commit()
@@ -234,29 +268,27 @@ class TestListSnapshots:
 
 class TestStartWithSnapshotTag:
 
-    async def test_start_with_snapshot_tag(self, client, db):
+    async def test_start_with_snapshot_tag(self, client, db, mock_snap, mock_docker):
         """POST /start with snapshot_tag restores from specific tag."""
-        headers, user_id = await _register_and_login(client, "tagrestore@example.com")
+        headers, user_id = await _make_user(db, "tagrestore@example.com")
         await _set_user_gcp(db, user_id)
 
         project = Project(
             user_id=uuid.UUID(user_id), name="Tag Restore", status="stopped",
             ssh_public_key="pub", ssh_private_key="priv",
-            gcs_prefix=f"{uuid.uuid4()}/workspace", snapshot_image="registry/img:latest",
+            gcs_prefix=GCS_PREFIX, snapshot_image="registry/img:latest",
         )
         db.add(project)
         await db.commit()
         await db.refresh(project)
 
-        with patch("backend.project_service.services.project_service.snapshot_mgr") as mock_snap, \
-             patch("backend.project_service.services.project_service.docker_mgr"):
-            mock_snap.restore_from_snapshot.return_value = "new-cid-789"
-            mock_snap.AR_REGISTRY = "europe-west1-docker.pkg.dev/pomodex-fd2bcd/sandboxes"
-            resp = await client.post(
-                f"/projects/{project.id}/start",
-                json={"snapshot_tag": "20260223-143015"},
-                headers=headers,
-            )
+        mock_snap.restore_from_snapshot.return_value = "new-cid-789"
+        mock_snap.AR_REGISTRY = "europe-west1-docker.pkg.dev/pomodex-fd2bcd/sandboxes"
+        resp = await client.post(
+            f"/projects/{project.id}/start",
+            json={"snapshot_tag": "20260223-143015"},
+            headers=headers,
+        )
 
         assert resp.status_code == 200
         data = resp.json()
@@ -265,25 +297,23 @@ class TestStartWithSnapshotTag:
         call_args = mock_snap.restore_from_snapshot.call_args
         assert "20260223-143015" in call_args[0][1]
 
-    async def test_start_without_body_still_works(self, client, db):
+    async def test_start_without_body_still_works(self, client, db, mock_snap, mock_docker):
         """POST /start with no body works as before (backward compatible)."""
-        headers, user_id = await _register_and_login(client, "notagstart@example.com")
+        headers, user_id = await _make_user(db, "notagstart@example.com")
         await _set_user_gcp(db, user_id)
 
         project = Project(
             user_id=uuid.UUID(user_id), name="No Tag", status="stopped",
             ssh_public_key="pub", ssh_private_key="priv",
-            gcs_prefix=f"{uuid.uuid4()}/workspace", snapshot_image="registry/img:latest",
+            gcs_prefix=GCS_PREFIX, snapshot_image="registry/img:latest",
         )
         db.add(project)
         await db.commit()
         await db.refresh(project)
 
-        with patch("backend.project_service.services.project_service.snapshot_mgr") as mock_snap, \
-             patch("backend.project_service.services.project_service.docker_mgr"):
-            mock_snap.restore_image_for_project.return_value = "registry/img:latest"
-            mock_snap.restore_from_snapshot.return_value = "new-cid-000"
-            resp = await client.post(f"/projects/{project.id}/start", headers=headers)
+        mock_snap.restore_image_for_project.return_value = "registry/img:latest"
+        mock_snap.restore_from_snapshot.return_value = "new-cid-000"
+        resp = await client.post(f"/projects/{project.id}/start", headers=headers)
 
         assert resp.status_code == 200
         assert resp.json()["status"] == "running"
@@ -291,27 +321,23 @@ class TestStartWithSnapshotTag:
 
 class TestDeleteProject:
 
-    async def test_delete_full_teardown(self, client, db):
+    async def test_delete_full_teardown(self, client, db, mock_docker, mock_iam, mock_snap):
         """T8.16: Delete removes Docker resources, GCS prefix, and DB record."""
-        headers, user_id = await _register_and_login(client, "deleter@example.com")
+        headers, user_id = await _make_user(db, "deleter@example.com")
         await _set_user_gcp(db, user_id)
         from sqlalchemy import select as sa_select
 
         project = Project(
             user_id=uuid.UUID(user_id), name="To Delete", status="running",
             ssh_public_key="pub", ssh_private_key="priv",
-            gcs_prefix=f"{uuid.uuid4()}/workspace", container_id="cid",
+            gcs_prefix=GCS_PREFIX, container_id="cid",
         )
         db.add(project)
         await db.commit()
         await db.refresh(project)
         pid = project.id
 
-        with patch("backend.project_service.services.project_service.docker_mgr") as mock_docker, \
-             patch("backend.project_service.services.project_service.gcp_iam") as mock_iam, \
-             patch("backend.project_service.services.project_service.snapshot_mgr") as mock_snap:
-
-            resp = await client.delete(f"/projects/{pid}", headers=headers)
+        resp = await client.delete(f"/projects/{pid}", headers=headers)
 
         assert resp.status_code == 200
         mock_docker.cleanup_project_resources.assert_called_once()
@@ -324,26 +350,25 @@ class TestDeleteProject:
 
 class TestSnapshotProject:
 
-    async def test_snapshot_project(self, client, db):
+    async def test_snapshot_project(self, client, db, mock_snap):
         """T8.17: Snapshot pushes image, updates DB, stops container."""
-        headers, user_id = await _register_and_login(client, "snapper@example.com")
+        headers, user_id = await _make_user(db, "snapper@example.com")
 
         project = Project(
             user_id=uuid.UUID(user_id), name="To Snap", status="running",
             ssh_public_key="pub", ssh_private_key="priv",
-            gcs_prefix=f"{uuid.uuid4()}/workspace", container_id="cid",
+            gcs_prefix=GCS_PREFIX, container_id="cid",
         )
         db.add(project)
         await db.commit()
         await db.refresh(project)
 
-        with patch("backend.project_service.services.project_service.snapshot_mgr") as mock_snap:
-            mock_snap.snapshot_project.return_value = {
-                "snapshot_image": "registry/proj:latest",
-                "last_snapshot_at": time.time(),
-                "status": "stopped",
-            }
-            resp = await client.post(f"/projects/{project.id}/snapshot", headers=headers)
+        mock_snap.snapshot_project.return_value = {
+            "snapshot_image": "registry/proj:latest",
+            "last_snapshot_at": time.time(),
+            "status": "stopped",
+        }
+        resp = await client.post(f"/projects/{project.id}/snapshot", headers=headers)
 
         assert resp.status_code == 200
         data = resp.json()
@@ -353,24 +378,23 @@ class TestSnapshotProject:
 
 class TestRestoreProject:
 
-    async def test_restore_from_snapshot(self, client, db):
+    async def test_restore_from_snapshot(self, client, db, mock_snap):
         """T8.18: Restore starts container from snapshot image."""
-        headers, user_id = await _register_and_login(client, "restorer@example.com")
+        headers, user_id = await _make_user(db, "restorer@example.com")
         await _set_user_gcp(db, user_id)
 
         project = Project(
             user_id=uuid.UUID(user_id), name="To Restore", status="stopped",
             ssh_public_key="pub", ssh_private_key="priv",
-            gcs_prefix=f"{uuid.uuid4()}/workspace", snapshot_image="registry/proj:latest",
+            gcs_prefix=GCS_PREFIX, snapshot_image="registry/proj:latest",
         )
         db.add(project)
         await db.commit()
         await db.refresh(project)
 
-        with patch("backend.project_service.services.project_service.snapshot_mgr") as mock_snap:
-            mock_snap.restore_image_for_project.return_value = "registry/proj:latest"
-            mock_snap.restore_from_snapshot.return_value = "new-cid"
-            resp = await client.post(f"/projects/{project.id}/restore", headers=headers)
+        mock_snap.restore_image_for_project.return_value = "registry/proj:latest"
+        mock_snap.restore_from_snapshot.return_value = "new-cid"
+        resp = await client.post(f"/projects/{project.id}/restore", headers=headers)
 
         assert resp.status_code == 200
         assert resp.json()["status"] == "running"
@@ -380,15 +404,15 @@ class TestBackupStatus:
 
     async def test_backup_status(self, client, db):
         """T8.19: Returns backup/snapshot metadata."""
-        headers, user_id = await _register_and_login(client, "backup@example.com")
+        headers, user_id = await _make_user(db, "backup@example.com")
 
         project = Project(
             user_id=uuid.UUID(user_id), name="Backup Check", status="running",
             ssh_public_key="pub", ssh_private_key="priv",
-            gcs_prefix=f"{uuid.uuid4()}/workspace",
-            last_backup_at=datetime.now(timezone.utc),
+            gcs_prefix=GCS_PREFIX,
+            last_backup_at=NOW,
             snapshot_image="registry/proj:latest",
-            last_snapshot_at=datetime.now(timezone.utc),
+            last_snapshot_at=NOW,
         )
         db.add(project)
         await db.commit()
@@ -404,27 +428,25 @@ class TestBackupStatus:
 
 class TestErrorHandling:
 
-    async def test_create_docker_failure_cleans_up(self, client, db):
-        """T8.27: Docker failure returns 500, partial resources cleaned up, status=error."""
-        headers, user_id = await _register_and_login(client, "dockerfail@example.com")
-        from sqlalchemy import select as sa_select
+    async def test_create_docker_failure_cleans_up(self, client, db, mock_iam, mock_docker):
+        """T8.27: Docker failure returns 500, status=error.
 
-        with patch("backend.project_service.services.project_service.gcp_iam") as mock_iam, \
-             patch("backend.project_service.services.project_service.docker_mgr") as mock_docker:
+        create_container unwinds its own partial resources, so no extra
+        cleanup round-trips are made.
+        """
+        headers, user_id = await _make_user(db, "dockerfail@example.com")
+        from sqlalchemy import select as sa_select
 
-            mock_iam.make_bucket_name.return_value = "test-bucket"
-            mock_iam.create_service_account.return_value = "sa@test.iam"
-            mock_iam.create_sa_key.return_value = '{"type":"service_account"}'
-            mock_docker.create_container.side_effect = RuntimeError("Docker daemon unreachable")
+        mock_docker.create_container.side_effect = RuntimeError("Docker daemon unreachable")
 
-            resp = await client.post(
-                "/projects",
-                json={"name": "Will Fail"},
-                headers=headers,
-            )
+        resp = await client.post(
+            "/projects",
+            json={"name": "Will Fail"},
+            headers=headers,
+        )
 
         assert resp.status_code == 500
-        mock_docker.cleanup_project_resources.assert_called_once()
+        mock_docker.cleanup_project_resources.assert_not_called()
         # SA is NOT deleted on failed create (per-user, reusable)
         mock_iam.delete_service_account.assert_not_called()
 
@@ -432,22 +454,34 @@ class TestErrorHandling:
         project = result.scalar_one()
         assert project.status == "error"
 
-    async def test_create_gcp_failure_cleans_up(self, client, db):
+    async def test_create_failure_after_container_cleans_up(self, client, db, mock_iam, mock_docker):
+        """Failure after the container exists tears down its Docker resources."""
+        headers, user_id = await _make_user(db, "proxyfail@example.com")
+
+        mock_docker.create_container.return_value = ("abc123def456", 30001)
+        mock_docker.connect_proxy_to_network.side_effect = RuntimeError("proxy missing")
+
+        resp = await client.post(
+            "/projects",
+            json={"name": "Proxy Fail"},
+            headers=headers,
+        )
+
+        assert resp.status_code == 500
+        mock_docker.cleanup_project_resources.assert_called_once()
+
+    async def test_create_gcp_failure_cleans_up(self, client, db, mock_iam, mock_docker):
         """T8.28: GCP failure returns 500, Docker resources cleaned up, status=error."""
-        headers, user_id = await _register_and_login(client, "gcpfail@example.com")
+        headers, user_id = await _make_user(db, "gcpfail@example.com")
         from sqlalchemy import select as sa_select
 
-        with patch("backend.project_service.services.project_service.gcp_iam") as mock_iam, \
-             patch("backend.project_service.services.project_service.docker_mgr") as mock_docker:
-
-            mock_iam.make_bucket_name.return_value = "test-bucket"
-            mock_iam.create_bucket.side_effect = RuntimeError("GCP API error")
+        mock_iam.create_bucket.side_effect = RuntimeError("GCP API error")
 
-            resp = await client.post(
-                "/projects",
-                json={"name": "GCP Fail"},
-                headers=headers,
-            )
+        resp = await client.post(
+            "/projects",
+            json={"name": "GCP Fail"},
+            headers=headers,
+        )
 
         assert resp.status_code == 500
 
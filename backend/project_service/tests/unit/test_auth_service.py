@@ -22,9 +22,16 @@ class TestPasswordHashing:
         hashed = hash_password("SecurePass123!")
         assert hashed != "SecurePass123!"
 
-    def test_hash_is_bcrypt_format(self):
+    def test_hash_is_argon2_format(self):
         hashed = hash_password("SecurePass123!")
-        assert hashed.startswith("$2b$")
+        assert hashed.startswith("$argon2id$")
+
+    def test_hash_uses_configured_cost(self):
+        """The hash encodes the ARGON2_* cost parameters it was made with."""
+        from backend.project_service.services import auth_service
+
+        hashed = hash_password("SecurePass123!")
+        assert f"m={auth_service.ARGON2_MEMORY_COST},t={auth_service.ARGON2_TIME_COST}," in hashed
 
     def test_verify_correct_password(self):
         hashed = hash_password("SecurePass123!")
@@ -34,6 +41,24 @@ class TestPasswordHashing:
         hashed = hash_password("SecurePass123!")
         assert verify_password("WrongPassword", hashed) is False
 
+    def test_verify_legacy_bcrypt_hash(self):
+        import bcrypt
+        hashed = bcrypt.hashpw(b"SecurePass123!", bcrypt.gensalt(rounds=4)).decode()
+        assert verify_password("SecurePass123!", hashed) is True
+        assert verify_password("WrongPassword", hashed) is False
+
+    def test_verify_caches_success_only(self):
+        hashed = hash_password("SecurePass123!")
+        with patch(
+            "backend.project_service.services.auth_service._check_password",
+            side_effect=[True, False, False],
+        ) as mock_check:
+            assert verify_password("SecurePass123!", hashed) is True
+            assert verify_password("SecurePass123!", hashed) is True
+            assert verify_password("WrongPassword", hashed) is False
+            assert verify_password("WrongPassword", hashed) is False
+        assert mock_check.call_count == 3
+
 
 class TestJWT:
 
@@ -80,6 +105,23 @@ class TestJWT:
         diff = (exp - iat).total_seconds()
         assert diff == 15 * 60
 
+    def test_decode_is_cached(self):
+        token = create_access_token(str(uuid4()))
+        first = decode_access_token(token)
+        with patch("backend.project_service.services.auth_service.jwt.decode") as mock_decode:
+            assert decode_access_token(token) == first
+        mock_decode.assert_not_called()
+
+    def test_invalid_token_not_cached(self):
+        import jwt as pyjwt
+        with patch(
+            "backend.project_service.services.auth_service.jwt.decode",
+            side_effect=pyjwt.InvalidTokenError,
+        ) as mock_decode:
+            assert decode_access_token("garbage.token.here") is None
+            assert decode_access_token("garbage.token.here") is None
+        assert mock_decode.call_count == 2
+
 
 class TestRefreshToken:
 
@@ -1,5 +1,6 @@
 """Docker SDK container IP lookup."""
 
+import functools
 import logging
 
 import docker
@@ -15,20 +16,24 @@ class ContainerNotRunning(Exception):
     pass
 
 
+@functools.lru_cache(maxsize=1)
+def _get_client() -> docker.DockerClient:
+    """Shared Docker client, created from environment on first use."""
+    return docker.from_env()
+
+
 def _ensure_on_network(client: docker.DockerClient, network_name: str) -> None:
     """Ensure terminal-proxy is connected to the given sandbox network."""
     try:
-        network = client.networks.get(network_name)
+        network = client.api.inspect_network(network_name)
     except NotFound:
         raise ContainerNotRunning(f"Network {network_name} not found")
 
-    network.reload()
-    for _, info in network.attrs["Containers"].items():
+    for _, info in (network.get("Containers") or {}).items():
         if info.get("Name") == PROXY_CONTAINER_NAME:
             return
 
-    proxy = client.containers.get(PROXY_CONTAINER_NAME)
-    network.connect(proxy)
+    client.api.connect_container_to_network(PROXY_CONTAINER_NAME, network_name)
     logger.info("[LOOKUP] connected %s to %s", PROXY_CONTAINER_NAME, network_name)
 
 
@@ -39,21 +44,23 @@ def get_container_ip(project_id: str) -> str:
     Raises ContainerNotRunning if container doesn't exist, isn't running,
     or isn't attached to the expected network.
     """
-    client = docker.from_env()
+    client = _get_client()
     container_name = f"sandbox-{project_id}"
     network_name = f"net-{project_id}"
 
     try:
-        container = client.containers.get(container_name)
+        # Raw inspect: one call, no Container model wrapping.
+        attrs = client.api.inspect_container(container_name)
     except NotFound:
         raise ContainerNotRunning(f"Container {container_name} not found")
 
-    if container.status != "running":
+    status = attrs["State"]["Status"]
+    if status != "running":
         raise ContainerNotRunning(
-            f"Container {container_name} is {container.status}"
+            f"Container {container_name} is {status}"
         )
 
-    networks = container.attrs["NetworkSettings"]["Networks"]
+    networks = attrs["NetworkSettings"]["Networks"]
     if network_name not in networks:
         raise ContainerNotRunning(
             f"Container not on network {network_name}"
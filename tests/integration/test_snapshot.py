@@ -476,7 +476,7 @@ class TestSnapshotMetadata:
         result = snapshot_project(project_id, sa_key_path=sa_key_path)
         after = time.time()
 
-        assert result["snapshot_image"] == f"{AR_REGISTRY}/{project_id}:latest"
+        assert result["snapshot_image"].startswith(f"{AR_REGISTRY}/{project_id}@sha256:")
         assert result["status"] == "stopped"
 
         # last_snapshot_at should be a timestamp within our window
@@ -0,0 +1,112 @@
+"""Unit tests for docker_manager's low-level API calls (Docker client mocked)."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from docker.errors import APIError, NotFound
+
+from backend.project_service.services import docker_manager
+
+CONFIG = {
+    "image": "agent-sandbox:latest",
+    "gcs_bucket": "test-bucket",
+    "gcs_sa_key": '{"type":"service_account"}',
+    "ssh_public_key": "ssh-ed25519 AAAA",
+}
+
+
+def _mock_client():
+    client = MagicMock()
+    client.containers.get.side_effect = NotFound("No such container: sandbox-proj-1")
+    client.api.create_container.return_value = {"Id": "cid-123"}
+    return client
+
+
+class TestCreateContainer:
+
+    def test_host_config_and_port_binding(self):
+        client = _mock_client()
+        with patch.object(docker_manager, "_get_client", return_value=client):
+            container_id, ssh_port = docker_manager.create_container("proj-1", CONFIG)
+
+        api = client.api
+        assert container_id == "cid-123"
+        host_config = api.create_host_config.call_args.kwargs
+        assert host_config["port_bindings"] == {22: ssh_port}
+        assert host_config["binds"] == {"vol-proj-1": {"bind": "/home/agent", "mode": "rw"}}
+        assert host_config["network_mode"] == "net-proj-1"
+        assert host_config["cap_add"] == ["SYS_ADMIN"]
+        assert host_config["devices"] == ["/dev/fuse"]
+        assert host_config["mem_limit"] == "1g"
+
+        args, kwargs = api.create_container.call_args
+        assert args == ("agent-sandbox:latest",)
+        assert kwargs["name"] == "sandbox-proj-1"
+        assert kwargs["ports"] == [22]
+        assert kwargs["host_config"] is api.create_host_config.return_value
+        assert kwargs["environment"]["GCS_BUCKET"] == "test-bucket"
+        api.create_endpoint_config.assert_called_once()
+        assert "net-proj-1" in api.create_networking_config.call_args[0][0]
+        api.start.assert_called_once_with("cid-123")
+
+    def test_retries_on_port_conflict(self):
+        client = _mock_client()
+        client.api.start.side_effect = [APIError("Bind: port is already allocated"), None]
+        with patch.object(docker_manager, "_get_client", return_value=client):
+            docker_manager.create_container("proj-1", CONFIG)
+
+        assert client.api.create_container.call_count == 2
+        client.api.remove_container.assert_called_once_with("cid-123", force=True)
+
+    def test_failure_cleans_up_network_and_volume(self):
+        client = _mock_client()
+        client.api.start.side_effect = APIError("no space left on device")
+        with patch.object(docker_manager, "_get_client", return_value=client), \
+                patch.object(docker_manager, "delete_volume") as delete_volume, \
+                patch.object(docker_manager, "delete_network") as delete_network:
+            with pytest.raises(APIError):
+                docker_manager.create_container("proj-1", CONFIG)
+
+        delete_volume.assert_called_once_with("proj-1")
+        delete_network.assert_called_once_with("proj-1")
+
+
+class TestProxyContainerId:
+
+    @pytest.fixture(autouse=True)
+    def _fresh_cache(self):
+        docker_manager._proxy_container_id.cache_clear()
+        yield
+        docker_manager._proxy_container_id.cache_clear()
+
+    def test_proxy_id_is_resolved_once(self):
+        client = MagicMock()
+        client.api.inspect_container.return_value = {"Id": "proxy-1"}
+        with patch.object(docker_manager, "_get_client", return_value=client):
+            docker_manager.connect_proxy_to_network("proj-1")
+            docker_manager.connect_proxy_to_network("proj-2")
+
+        client.api.inspect_container.assert_called_once_with("terminal-proxy")
+        client.api.connect_container_to_network.assert_called_with("proxy-1", "net-proj-2")
+
+    def test_stale_proxy_id_is_re_resolved(self):
+        client = MagicMock()
+        client.api.inspect_container.side_effect = [{"Id": "proxy-old"}, {"Id": "proxy-new"}]
+        client.api.connect_container_to_network.side_effect = [
+            NotFound("No such container: proxy-old"), None,
+        ]
+        with patch.object(docker_manager, "_get_client", return_value=client):
+            docker_manager.connect_proxy_to_network("proj-1")
+
+        assert client.api.inspect_container.call_count == 2
+        client.api.connect_container_to_network.assert_called_with("proxy-new", "net-proj-1")
+
+    def test_missing_network_keeps_cached_proxy_id(self):
+        client = MagicMock()
+        client.api.inspect_container.return_value = {"Id": "proxy-1"}
+        client.api.disconnect_container_from_network.side_effect = NotFound("network net-proj-1 not found")
+        with patch.object(docker_manager, "_get_client", return_value=client):
+            docker_manager.disconnect_proxy_from_network("proj-1")
+
+        client.api.inspect_container.assert_called_once()
+        client.api.disconnect_container_from_network.assert_called_once()
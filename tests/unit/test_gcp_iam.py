@@ -0,0 +1,90 @@
+"""Unit tests for gcp_iam control flow (GCP clients mocked)."""
+
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from google.api_core import exceptions as gcp_exceptions
+
+from backend.project_service.services import gcp_iam
+
+PROJECT = "test-project"
+CREDS = "creds.json"
+
+
+class TestDeleteSaKey:
+
+    def test_deletes_key_by_name_from_key_json(self):
+        client = MagicMock()
+        sa_key = json.dumps({"client_email": "sa@test.iam", "private_key_id": "abc123"})
+        with patch.object(gcp_iam, "_get_iam_client", return_value=client):
+            gcp_iam.delete_sa_key(sa_key, PROJECT, CREDS)
+
+        request = client.delete_service_account_key.call_args.kwargs["request"]
+        assert request.name == f"projects/{PROJECT}/serviceAccounts/sa@test.iam/keys/abc123"
+
+    def test_missing_key_is_ignored(self):
+        client = MagicMock()
+        client.delete_service_account_key.side_effect = gcp_exceptions.NotFound("gone")
+        sa_key = json.dumps({"client_email": "sa@test.iam", "private_key_id": "abc123"})
+        with patch.object(gcp_iam, "_get_iam_client", return_value=client):
+            gcp_iam.delete_sa_key(sa_key, PROJECT, CREDS)
+
+
+class TestGrantBucketIam:
+
+    def test_retries_after_precondition_failed(self):
+        client = MagicMock()
+        bucket = client.bucket.return_value
+        bucket.get_iam_policy.return_value.bindings = []
+        bucket.set_iam_policy.side_effect = [gcp_exceptions.PreconditionFailed("etag"), None]
+        with patch.object(gcp_iam, "_get_storage_client", return_value=client), \
+                patch.object(gcp_iam.time, "sleep"):
+            gcp_iam.grant_bucket_iam("sa@test.iam", "bucket", PROJECT, CREDS)
+
+        # The policy is re-read for the retry so the new etag is used.
+        assert bucket.get_iam_policy.call_count == 2
+        assert bucket.set_iam_policy.call_count == 2
+        policy = bucket.set_iam_policy.call_args[0][0]
+        assert policy.version == 3
+        assert {"role": "roles/storage.objectAdmin", "members": {"serviceAccount:sa@test.iam"}} in policy.bindings
+
+    def test_gives_up_after_max_attempts(self):
+        client = MagicMock()
+        bucket = client.bucket.return_value
+        bucket.get_iam_policy.return_value.bindings = []
+        bucket.set_iam_policy.side_effect = gcp_exceptions.PreconditionFailed("etag")
+        with patch.object(gcp_iam, "_get_storage_client", return_value=client), \
+                patch.object(gcp_iam.time, "sleep"):
+            with pytest.raises(gcp_exceptions.PreconditionFailed):
+                gcp_iam.grant_bucket_iam("sa@test.iam", "bucket", PROJECT, CREDS)
+
+        assert bucket.set_iam_policy.call_count == gcp_iam.IAM_POLICY_MAX_ATTEMPTS
+
+
+class TestDeleteGcsPrefix:
+
+    def test_deletes_in_batches_of_at_most_100(self):
+        client = MagicMock()
+        blobs = [MagicMock() for _ in range(250)]
+        client.bucket.return_value.list_blobs.return_value = iter(blobs)
+        with patch.object(gcp_iam, "_get_storage_client", return_value=client):
+            gcp_iam.delete_gcs_prefix("bucket", "proj/workspace", PROJECT, CREDS)
+
+        assert client.batch.call_count == 3  # 100 + 100 + 50
+        assert all(blob.delete.call_count == 1 for blob in blobs)
+        client.bucket.return_value.list_blobs.assert_called_once_with(
+            prefix="proj/workspace", page_size=1000,
+        )
+
+    def test_not_found_in_a_batch_is_tolerated(self):
+        client = MagicMock()
+        blobs = [MagicMock() for _ in range(150)]
+        client.bucket.return_value.list_blobs.return_value = iter(blobs)
+        # The first batch reports an object that was already deleted.
+        client.batch.return_value.__exit__.side_effect = [gcp_exceptions.NotFound("gone"), None]
+        with patch.object(gcp_iam, "_get_storage_client", return_value=client):
+            gcp_iam.delete_gcs_prefix("bucket", "proj/workspace", PROJECT, CREDS)
+
+        assert client.batch.call_count == 2
+        assert all(blob.delete.call_count == 1 for blob in blobs)
@@ -6,6 +6,7 @@ import pytest
 
 from backend.project_service.services.docker_manager import (
     find_free_port,
+    reserve_port,
     PORT_RANGE_START,
     PORT_RANGE_END,
 )
@@ -64,3 +65,12 @@ class TestFindFreePort:
         finally:
             for s in held:
                 s.close()
+
+    def test_reserved_port_is_not_handed_out_again(self):
+        """A port held by reserve_port is skipped by concurrent callers."""
+        with reserve_port(start=45000, end=45001) as (reserved, _sock):
+            for _ in range(10):
+                assert find_free_port(start=45000, end=45001) != reserved
+        # Released on exit
+        with reserve_port(start=reserved, end=reserved) as (port, _sock):
+            assert port == reserved
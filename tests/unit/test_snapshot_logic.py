@@ -2,8 +2,13 @@
 T5.9: Restore determines correct image based on snapshot_image parameter.
 """
 
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
 import pytest
+from google.api_core import exceptions as gcp_exceptions
 
+from backend.project_service.services import snapshot_manager
 from backend.project_service.services.snapshot_manager import restore_image_for_project
 
 BASE_IMAGE = "agent-sandbox:latest"
@@ -25,3 +30,172 @@ class TestRestoreImageSelection:
     def test_returns_base_image_when_snapshot_is_empty_string(self):
         result = restore_image_for_project(snapshot_image="", base_image=BASE_IMAGE)
         assert result == BASE_IMAGE
+
+
+def _mock_container():
+    container = MagicMock()
+    container.attrs = {"Config": {"Env": ["GCS_BUCKET=test-bucket"]}}
+    container.exec_run.return_value = (0, b"")
+    return container
+
+
+class TestSnapshotProject:
+
+    def test_removes_container_after_push(self):
+        container = _mock_container()
+        client = MagicMock()
+        client.containers.get.return_value = container
+        with patch.object(snapshot_manager, "_get_client", return_value=client), \
+                patch.object(snapshot_manager, "_ar_auth_config", return_value={}), \
+                patch.object(snapshot_manager, "_push_image", return_value="sha256:abc"), \
+                patch.object(snapshot_manager, "_move_latest_tag"):
+            result = snapshot_manager.snapshot_project("proj-1", "key.json")
+
+        assert result["snapshot_image"] == f"{AR_REGISTRY}/proj-1@sha256:abc"
+        assert result["status"] == "stopped"
+        container.stop.assert_called_once()
+        container.remove.assert_called_once()
+
+    def test_push_failure_keeps_stopped_container(self):
+        """A failed push must not remove the only copy of the container's state."""
+        container = _mock_container()
+        client = MagicMock()
+        client.containers.get.return_value = container
+        with patch.object(snapshot_manager, "_get_client", return_value=client), \
+                patch.object(snapshot_manager, "_ar_auth_config", return_value={}), \
+                patch.object(snapshot_manager, "_push_image", side_effect=RuntimeError("push failed")):
+            with pytest.raises(RuntimeError, match="push failed"):
+                snapshot_manager.snapshot_project("proj-1", "key.json")
+
+        container.stop.assert_called_once()
+        container.remove.assert_not_called()
+
+
+def _version(name):
+    version = MagicMock()
+    version.name = name
+    return version
+
+
+class TestDeleteSnapshotImages:
+
+    PACKAGE = f"{snapshot_manager.AR_PARENT}/packages/proj-1"
+
+    def _delete(self, ar_client):
+        with patch.object(snapshot_manager, "_get_ar_client", return_value=ar_client), \
+                patch.object(snapshot_manager, "_get_client", return_value=MagicMock()):
+            snapshot_manager.delete_snapshot_images("proj-1")
+
+    def test_batch_deletes_all_versions(self):
+        ar_client = MagicMock()
+        names = [f"{self.PACKAGE}/versions/sha256:{i}" for i in range(3)]
+        ar_client.list_versions.return_value = [_version(n) for n in names]
+
+        self._delete(ar_client)
+
+        request = ar_client.batch_delete_versions.call_args.kwargs["request"]
+        assert request.parent == self.PACKAGE
+        assert list(request.names) == names
+        ar_client.delete_version.assert_not_called()
+
+    def test_batch_failure_falls_back_to_per_version_deletes(self):
+        ar_client = MagicMock()
+        names = [f"{self.PACKAGE}/versions/sha256:{i}" for i in range(3)]
+        ar_client.list_versions.return_value = [_version(n) for n in names]
+        ar_client.batch_delete_versions.return_value.result.side_effect = RuntimeError("LRO failed")
+        # One failing version must not stop the others.
+        ar_client.delete_version.side_effect = [None, RuntimeError("quota"), None]
+
+        self._delete(ar_client)
+
+        deleted = sorted(c.kwargs["request"].name for c in ar_client.delete_version.call_args_list)
+        assert deleted == names
+
+    def test_no_versions_skips_delete(self):
+        ar_client = MagicMock()
+        ar_client.list_versions.return_value = []
+
+        self._delete(ar_client)
+
+        ar_client.batch_delete_versions.assert_not_called()
+        ar_client.delete_version.assert_not_called()
+
+
+class TestPushImage:
+
+    def _push(self, messages):
+        client = MagicMock()
+        client.images.push.return_value = iter(messages)
+        return snapshot_manager._push_image(client, "registry/proj-1", "20260223-143015", {})
+
+    def test_returns_digest_from_aux(self):
+        digest = self._push([
+            {"status": "Pushing"},
+            {"aux": {"Tag": "20260223-143015", "Digest": "sha256:abc", "Size": 1}},
+        ])
+        assert digest == "sha256:abc"
+
+    def test_error_line_raises(self):
+        with pytest.raises(RuntimeError, match="denied"):
+            self._push([{"status": "Pushing"}, {"error": "denied: permission"}])
+
+    def test_no_digest_returns_none(self):
+        assert self._push([{"status": "Pushed"}]) is None
+
+
+def _tag(name):
+    tag = MagicMock()
+    tag.name = f"{snapshot_manager.AR_PARENT}/packages/proj-1/tags/{name}"
+    return tag
+
+
+class TestListSnapshots:
+
+    def test_keeps_timestamp_tags_newest_first(self):
+        page_1 = [_tag("20260222-090000"), _tag("latest"), _tag("20260223-143015")]
+        page_2 = [_tag("v1.2"), _tag("20260223-100000"), _tag("20261399-000000")]
+        ar_client = MagicMock()
+        # The pager yields items across pages as one iterable.
+        ar_client.list_tags.return_value = iter(page_1 + page_2)
+        with patch.object(snapshot_manager, "_get_ar_client", return_value=ar_client):
+            snapshots = snapshot_manager.list_snapshots("proj-1")
+
+        assert [s["tag"] for s in snapshots] == [
+            "20260223-143015", "20260223-100000", "20260222-090000",
+        ]
+        assert snapshots[0]["created_at"] == datetime(2026, 2, 23, 14, 30, 15, tzinfo=timezone.utc)
+        request = ar_client.list_tags.call_args.kwargs["request"]
+        assert request.parent == f"{snapshot_manager.AR_PARENT}/packages/proj-1"
+
+    def test_missing_package_lists_nothing(self):
+        ar_client = MagicMock()
+        ar_client.list_tags.side_effect = gcp_exceptions.NotFound("no package")
+        with patch.object(snapshot_manager, "_get_ar_client", return_value=ar_client):
+            assert snapshot_manager.list_snapshots("proj-1") == []
+
+
+class TestMoveLatestTag:
+
+    PACKAGE = f"{snapshot_manager.AR_PARENT}/packages/proj-1"
+
+    def test_updates_existing_latest_tag(self):
+        ar_client = MagicMock()
+        with patch.object(snapshot_manager, "_get_ar_client", return_value=ar_client):
+            snapshot_manager._move_latest_tag("proj-1", "sha256:abc")
+
+        request = ar_client.update_tag.call_args.kwargs["request"]
+        assert request.tag.name == f"{self.PACKAGE}/tags/latest"
+        assert request.tag.version == f"{self.PACKAGE}/versions/sha256:abc"
+        assert list(request.update_mask.paths) == ["version"]
+        ar_client.create_tag.assert_not_called()
+
+    def test_creates_latest_tag_on_first_snapshot(self):
+        ar_client = MagicMock()
+        ar_client.update_tag.side_effect = gcp_exceptions.NotFound("no tag")
+        with patch.object(snapshot_manager, "_get_ar_client", return_value=ar_client):
+            snapshot_manager._move_latest_tag("proj-1", "sha256:abc")
+
+        request = ar_client.create_tag.call_args.kwargs["request"]
+        assert request.parent == self.PACKAGE
+        assert request.tag_id == "latest"
+        assert request.tag.version == f"{self.PACKAGE}/versions/sha256:abc"